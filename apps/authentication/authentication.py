@@ -0,0 +1,216 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+from .tokens import CachedBlacklistRefreshToken
+
+
+class TokenVerificationCache:
+    """
+    Bounded per-process LRU of verified access tokens, keyed by the raw token.
+
+    A hit skips signature verification; entries are dropped once the token's ``exp``
+    has passed, so an expired token is always re-verified (and rejected).
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, raw_token):
+        with self._lock:
+            entry = self._entries.get(raw_token)
+            if entry is None:
+                return None
+            if entry["exp"] <= time.time():
+                del self._entries[raw_token]
+                return None
+            self._entries.move_to_end(raw_token)
+            return entry["token"]
+
+    def set(self, raw_token, token):
+        with self._lock:
+            self._entries[raw_token] = {"token": token, "exp": token.get("exp", 0)}
+            self._entries.move_to_end(raw_token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verified_tokens = TokenVerificationCache(settings.JWT_VERIFY_CACHE_SIZE)
+
+CACHED_USER_FIELDS = ("id", "role", "is_active")
+
+
+def detached_user(**fields):
+    """``User`` loaded with just ``fields``; the others are deferred, as with ``.only()``."""
+    names = [field.attname for field in User._meta.concrete_fields if field.attname in fields]
+    return User.from_db(User.objects.db, names, [fields[name] for name in names])
+
+
+class UserCache:
+    """
+    Two-level cache of the ``User`` fields token authentication needs.
+
+    Only ``CACHED_USER_FIELDS`` are cached, never the password hash or other
+    profile data; each hit is rebuilt into a ``User`` that loads any other field
+    from the database on first access. A per-process LRU holds the fields for
+    ``JWT_USER_LOCAL_CACHE_SECONDS`` in front of the shared Django cache, which
+    holds them for ``JWT_USER_CACHE_SECONDS``. Saving or deleting a user clears
+    both in the process that made the change; other processes pick the change up
+    once their short local entry expires.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, user_id):
+        return f"auth_user_fields:{user_id}"
+
+    def get(self, user_id):
+        user_id = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                return detached_user(**entry[0])
+
+        fields = cache.get(self._key(user_id))
+        if fields is None:
+            fields = User.objects.filter(pk=user_id).values(*CACHED_USER_FIELDS).first()
+            if fields is None:
+                return None
+            cache.set(self._key(user_id), fields, settings.JWT_USER_CACHE_SECONDS)
+
+        with self._lock:
+            self._entries[user_id] = (fields, now + settings.JWT_USER_LOCAL_CACHE_SECONDS)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return detached_user(**fields)
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        cache.delete(self._key(user_id))
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(settings.JWT_USER_CACHE_SIZE)
+
+
+def set_user_claims(token, user):
+    """Copy ``user``'s current ``role``, ``username`` and ``email`` onto ``token``."""
+    token["role"] = user.role
+    token["username"] = user.username
+    token["email"] = user.email
+
+
+def tokens_for_user(user):
+    """Refresh token for ``user`` carrying ``role``, ``username`` and ``email`` claims."""
+    refresh = CachedBlacklistRefreshToken.for_user(user)
+    set_user_claims(refresh, user)
+    return refresh
+
+
+def user_from_claims(validated_token, user_id):
+    """Unsaved ``User`` built from token claims, for ``JWT_TRUST_ROLE_CLAIMS``."""
+    return detached_user(
+        id=user_id,
+        role=validated_token["role"],
+        username=validated_token.get("username", ""),
+        email=validated_token.get("email", ""),
+        is_active=True,
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that verifies each access token once per process.
+
+    ``RateLimitMiddleware`` resolves the token before DRF runs and leaves it on the
+    request as ``jwt_token``; it is reused here instead of parsing the header again.
+    Users come from ``user_cache``, or straight from the token's claims when
+    ``JWT_TRUST_ROLE_CLAIMS`` is on and the token has a ``role`` claim.
+    """
+
+    def authenticate(self, request):
+        validated_token = getattr(request._request, "jwt_token", None)
+        if validated_token is None:
+            return super().authenticate(request)
+        return self.get_user(validated_token), validated_token
+
+    def get_validated_token(self, raw_token):
+        validated_token = verified_tokens.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            verified_tokens.set(raw_token, validated_token)
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        if settings.JWT_TRUST_ROLE_CLAIMS and "role" in validated_token:
+            return user_from_claims(validated_token, user_id)
+
+        user = user_cache.get(user_id)
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
+
+def resolve_request_token(request):
+    """
+    Validated access token from the request's ``Authorization`` header, or ``None``.
+
+    Invalid or malformed tokens resolve to ``None`` here and are rejected with the
+    usual error once DRF authenticates the request.
+    """
+    if not hasattr(request, "jwt_token"):
+        request.jwt_token = None
+        authentication = CachedJWTAuthentication()
+        header = authentication.get_header(request)
+        if header is not None:
+            try:
+                raw_token = authentication.get_raw_token(header)
+                if raw_token is not None:
+                    request.jwt_token = authentication.get_validated_token(raw_token)
+            except (AuthenticationFailed, InvalidToken):
+                pass
+    return request.jwt_token
+
+
+def user_role(user_id):
+    user = user_cache.get(user_id)
+    return user.role if user is not None else None
+
+
+def token_identity(token):
+    """``(user_id, role)`` for a validated token, preferring a ``role`` claim when present."""
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return None, None
+    return user_id, token.get("role") or user_role(user_id)
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.authentication.tokens import blacklisted_jtis
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of expired tokens deleted per transaction.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Seconds to pause between chunks to leave room for other writers.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now()
+        expired = OutstandingToken.objects.filter(expires_at__lte=cutoff).order_by("id")
+
+        deleted = 0
+        last_id = 0
+        while True:
+            ids = list(
+                expired.filter(id__gt=last_id).values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        # Reload this process's blacklist so it no longer tracks the pruned rows.
+        blacklisted_jtis.reload()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} expired token(s)"))
@@ -2,8 +2,13 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 
+from .authentication import set_user_claims
 from .models import User
+from .tokens import CachedBlacklistRefreshToken
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -95,3 +100,41 @@ class TokenObtainPairResponseSerializer(serializers.Serializer):
 
     class Meta:
         fields = ["access", "refresh", "user"]
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh that re-reads the user instead of copying the old token's claims.
+
+    With ``JWT_TRUST_ROLE_CLAIMS`` the ``role`` claim is what authorizes requests, so
+    a demoted or deactivated user must lose it at the next refresh rather than keep
+    rotating it forward.
+    """
+
+    token_class = CachedBlacklistRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        set_user_claims(refresh, user)
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data["refresh"] = str(refresh)
+
+        return data
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_id = instance.pk
+    user_cache.invalidate(user_id)
+    # Drop anything cached from the old row by a concurrent request before commit.
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
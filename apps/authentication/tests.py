@@ -1,3 +1,163 @@
-from django.test import TestCase
+import io
+import time
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import tokens_for_user, user_cache, user_from_claims
+from .models import User
+from .tokens import blacklisted_jtis
+
+
+@override_settings(JWT_TRUST_ROLE_CLAIMS=True)
+class TokenRefreshTests(APITestCase):
+    url = "/api/auth/token/refresh/"
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        blacklisted_jtis.clear()
+        self.user = User.objects.create_user(
+            "admin@example.com", "admin", "password123!", role="admin"
+        )
+        self.refresh = str(tokens_for_user(self.user))
+
+    def test_refresh_reads_the_current_role(self):
+        self.user.role = "user"
+        self.user.save()
+
+        response = self.client.post(self.url, {"refresh": self.refresh}, format="json")
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(AccessToken(response.data["access"])["role"], "user")
+        profile = self.client.get(
+            "/api/auth/profile/", HTTP_AUTHORIZATION=f"Bearer {response.data['access']}"
+        )
+        self.assertEqual(profile.json()["role"], "user")
+
+        # The rotated refresh token carries the new role forward as well.
+        response = self.client.post(self.url, {"refresh": response.data["refresh"]}, format="json")
+        self.assertEqual(AccessToken(response.data["access"])["role"], "user")
+
+    def test_refresh_rejects_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.post(self.url, {"refresh": self.refresh}, format="json")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn("access", response.data)
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        first = self.client.post(self.url, {"refresh": self.refresh}, format="json")
+        second = self.client.post(self.url, {"refresh": self.refresh}, format="json")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 401)
+
+
+class UserCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user("user@example.com", "user", "password123!")
+        self.access = str(tokens_for_user(self.user).access_token)
+
+    def profile(self):
+        return self.client.get("/api/auth/profile/", HTTP_AUTHORIZATION=f"Bearer {self.access}")
+
+    def test_shared_cache_holds_only_the_auth_fields(self):
+        response = self.profile()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["email"], "user@example.com")
+        self.assertEqual(
+            cache.get(f"auth_user_fields:{self.user.pk}"),
+            {"id": self.user.pk, "role": "user", "is_active": True},
+        )
+
+    def test_cached_user_is_rebuilt_from_the_fields(self):
+        user_cache.get(self.user.pk)
+
+        with self.assertNumQueries(0):
+            user = user_cache.get(self.user.pk)
+        self.assertEqual((user.pk, user.role, user.is_active), (self.user.pk, "user", True))
+        self.assertLessEqual({"password", "email", "username"}, user.get_deferred_fields())
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "user@example.com")
+        self.assertFalse(user._state.adding)
+
+    def test_saved_changes_reach_the_next_request(self):
+        self.assertEqual(self.profile().status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.profile().status_code, 401)
+
+    def test_user_from_claims_keeps_each_claim_on_its_field(self):
+        token = AccessToken(self.access)
+
+        user = user_from_claims(token, self.user.pk)
+        self.assertEqual(
+            (user.pk, user.role, user.username, user.email, user.is_active),
+            (self.user.pk, "user", "user", "user@example.com", True),
+        )
+
+
+class PruneTokensTests(TestCase):
+    def setUp(self):
+        blacklisted_jtis.clear()
+        self.user = User.objects.create_user("user@example.com", "user", "password123!")
+        now = timezone.now()
+        self.tokens = {
+            name: OutstandingToken.objects.create(
+                user=self.user,
+                jti=name,
+                token=name,
+                created_at=now - timedelta(days=2),
+                expires_at=now + timedelta(hours=hours),
+            )
+            for name, hours in [
+                ("expired", -2),
+                ("expired-blacklisted", -1),
+                ("live", 1),
+                ("live-blacklisted", 2),
+            ]
+        }
+        for name in ("expired-blacklisted", "live-blacklisted"):
+            BlacklistedToken.objects.create(token=self.tokens[name])
+
+    def prune(self, **options):
+        output = io.StringIO()
+        call_command("prune_tokens", stdout=output, **options)
+        return output.getvalue()
+
+    def test_only_expired_tokens_are_removed(self):
+        self.assertIn("Pruned 2 expired token(s)", self.prune(batch_size=1))
+
+        self.assertEqual(
+            set(OutstandingToken.objects.values_list("jti", flat=True)),
+            {"live", "live-blacklisted"},
+        )
+        self.assertEqual(
+            list(BlacklistedToken.objects.values_list("token__jti", flat=True)),
+            ["live-blacklisted"],
+        )
+        self.assertIn("Pruned 0 expired token(s)", self.prune())
+
+    def test_blacklist_cache_is_reloaded(self):
+        blacklisted_jtis.sync(force=True)
+        # A stale entry this process still holds for a row about to be pruned.
+        blacklisted_jtis.add("expired-blacklisted", time.time() + 60)
+
+        self.prune()
+
+        self.assertIn("live-blacklisted", blacklisted_jtis)
+        self.assertNotIn("expired-blacklisted", blacklisted_jtis)
@@ -0,0 +1,102 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class BlacklistedJTICache:
+    """
+    Per-process set of blacklisted refresh-token JTIs.
+
+    The set is loaded once, then caught up with rows whose id is above the last one
+    seen, at most every ``JWT_BLACKLIST_SYNC_SECONDS``. Entries are dropped when
+    their token expires. If the highest blacklist id goes backwards (rows pruned and
+    ids reused), the set is reloaded from scratch.
+    """
+
+    def __init__(self):
+        self._jtis = {}
+        self._last_id = None
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def _rows(self, queryset):
+        return queryset.order_by("id").values_list("id", "token__jti", "token__expires_at")
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._synced_at < settings.JWT_BLACKLIST_SYNC_SECONDS:
+            return
+
+        with self._lock:
+            if not force and now - self._synced_at < settings.JWT_BLACKLIST_SYNC_SECONDS:
+                return
+
+            queryset = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            if self._last_id is not None:
+                max_id = BlacklistedToken.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+                if max_id < self._last_id:
+                    self._jtis = {}
+                    self._last_id = None
+                else:
+                    queryset = queryset.filter(id__gt=self._last_id)
+
+            for row_id, jti, expires_at in self._rows(queryset).iterator():
+                self._jtis[jti] = expires_at.timestamp()
+                self._last_id = max(self._last_id or 0, row_id)
+            if self._last_id is None:
+                self._last_id = 0
+
+            expired = time.time()
+            self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > expired}
+            self._synced_at = now
+
+    def add(self, jti, exp):
+        with self._lock:
+            self._jtis[jti] = exp
+
+    def __contains__(self, jti):
+        self.sync()
+        return jti in self._jtis
+
+    def clear(self):
+        with self._lock:
+            self._jtis = {}
+            self._last_id = None
+            self._synced_at = 0.0
+
+    def reload(self):
+        """Drop every entry and load the blacklist again from the database."""
+        self.clear()
+        self.sync(force=True)
+
+
+blacklisted_jtis = BlacklistedJTICache()
+
+
+class CachedBlacklistRefreshToken(RefreshToken):
+    """
+    ``RefreshToken`` that checks the blacklist against ``blacklisted_jtis``.
+
+    A token blacklisted by another process within the last sync interval can pass
+    ``check_blacklist``, but rotation still blacklists it with ``get_or_create``,
+    and finding it already there rejects the refresh. Reuse therefore stays
+    impossible without a query per check.
+    """
+
+    def check_blacklist(self):
+        if self.payload[api_settings.JTI_CLAIM] in blacklisted_jtis:
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        blacklisted_jtis.add(self.payload[api_settings.JTI_CLAIM], self.payload["exp"])
+        if not created:
+            raise TokenError("Token is blacklisted")
+        return blacklisted, created
@@ -2,10 +2,11 @@ from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import tokens_for_user
 from .models import User
 from .serializers import LoginSerializer, RegisterSerializer, UserSerializer
+from .tokens import CachedBlacklistRefreshToken
 
 
 class RegisterView(generics.CreateAPIView):
@@ -18,7 +19,7 @@ class RegisterView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
 
         return Response(
             {
@@ -42,7 +43,7 @@ class LoginView(APIView):
         serializer.is_valid(raise_exception=True)
 
         user = serializer.validated_data["user"]
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
 
         return Response(
             {
@@ -68,7 +69,7 @@ class LogoutView(APIView):
                     {"error": "Refresh token is required"}, status=status.HTTP_400_BAD_REQUEST
                 )
 
-            token = RefreshToken(refresh_token)
+            token = CachedBlacklistRefreshToken(refresh_token)
             token.blacklist()
 
             return Response({"message": "Logout successful"}, status=status.HTTP_200_OK)
@@ -81,4 +82,5 @@ class UserProfileView(generics.RetrieveAPIView):
     serializer_class = UserSerializer
 
     def get_object(self):
-        return self.request.user
+        # Token authentication only loads the fields it needs onto request.user.
+        return User.objects.get(pk=self.request.user.pk)
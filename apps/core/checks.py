@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+from django.utils.module_loading import import_string
+
+from .ratelimit import CacheBackend, DatabaseBackend
+
+
+def is_process_local(alias):
+    """Whether cache ``alias`` keeps its data inside the current process."""
+    return isinstance(caches[alias], LocMemCache)
+
+
+@register(Tags.caches)
+def check_rate_limit_backend(app_configs, **kwargs):
+    """
+    Rate limits only hold across workers when their counters are shared. Development
+    servers run one process, so the checks only apply when ``DEBUG`` is off.
+    """
+    if settings.DEBUG:
+        return []
+
+    backend = import_string(settings.RATE_LIMIT_BACKEND)
+    if issubclass(backend, CacheBackend) and is_process_local(settings.RATE_LIMIT_CACHE):
+        return [
+            Warning(
+                f"RATE_LIMIT_CACHE '{settings.RATE_LIMIT_CACHE}' is a LocMemCache, so every "
+                "worker process keeps its own rate limit counters.",
+                hint="Point RATE_LIMIT_CACHE at a Redis or Memcached cache.",
+                id="core.W001",
+            )
+        ]
+    if issubclass(backend, DatabaseBackend):
+        return [
+            Warning(
+                "The database rate limit backend writes a counter row on every request.",
+                hint="Use apps.core.ratelimit.CacheBackend with a Redis or Memcached cache "
+                "for production traffic.",
+                id="core.W002",
+            )
+        ]
+    return []
@@ -1,47 +1,106 @@
 import time
 
-from django.core.cache import cache
+from django.conf import settings
 from django.http import JsonResponse
 
+from apps.authentication.authentication import resolve_request_token, token_identity
+
+from .ratelimit import load_quotas, match_quota, rate_limiter
+
 
 class RateLimitMiddleware:
+    """
+    Per-client request limits, weighted per endpoint by ``RATE_LIMIT_QUOTAS``.
+
+    Every request is charged against the general ``RATE_LIMITS`` bucket for the
+    caller's role; a matching quota sets the charge and may add its own bucket.
+    The ``X-RateLimit-*`` headers describe whichever bucket has the least room left.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.window = settings.RATE_LIMIT_WINDOW
+        self.limits = settings.RATE_LIMITS
+        self.quotas = load_quotas(settings.RATE_LIMIT_QUOTAS)
 
     def __call__(self, request):
         if request.path.startswith("/admin/"):
             return self.get_response(request)
 
-        if request.user.is_authenticated:
-            if hasattr(request.user, "role") and request.user.role == "admin":
-                limit = 1000
-            else:
-                limit = 100
-            identifier = f"rate_limit_user_{request.user.id}"
+        user_id, role = self.get_identity(request)
+        if user_id is not None:
+            role = "admin" if role == "admin" else "user"
+            identifier = f"user_{user_id}"
         else:
-            limit = 10
-            identifier = f"rate_limit_ip_{self.get_client_ip(request)}"
-
-        current_requests = cache.get(identifier, 0)
-
-        if current_requests >= limit:
-            return JsonResponse(
-                {
-                    "error": "Rate limit exceeded",
-                    "message": f"Too many requests. Limit is {limit} requests per minute.",
-                },
-                status=429,
+            role = "anonymous"
+            identifier = f"ip_{self.get_client_ip(request)}"
+
+        now = time.time()
+        quota = match_quota(self.quotas, request)
+        cost = quota.cost_for(request) if quota else 1
+
+        # A request may never cost more than a full bucket, or a large enough body
+        # would be rejected forever instead of waiting for the bucket to drain.
+        capacity = self.limits[role]
+        if quota and quota.limits and role in quota.limits:
+            capacity = min(capacity, quota.limits[role])
+        cost = min(cost, capacity)
+
+        quota_result = None
+        if quota and quota.limits and role in quota.limits:
+            quota_result = rate_limiter.hit(
+                f"{identifier}:{quota.name}", quota.limits[role], quota.window, cost, now
             )
+            if not quota_result.allowed:
+                return self.limited(
+                    quota_result,
+                    cost,
+                    quota.name,
+                    f"Too many '{quota.name}' requests. Limit is {quota_result.limit} units "
+                    f"per {quota.window} seconds.",
+                )
 
-        cache.set(identifier, current_requests + 1, 60)
+        result = rate_limiter.hit(identifier, self.limits[role], self.window, cost, now)
+        if not result.allowed:
+            if quota_result is not None:
+                rate_limiter.refund(f"{identifier}:{quota.name}", quota.window, cost, now)
+            return self.limited(
+                result,
+                cost,
+                "default",
+                f"Too many requests. Limit is {result.limit} units per {self.window} seconds.",
+            )
 
         response = self.get_response(request)
-        response["X-RateLimit-Limit"] = str(limit)
-        response["X-RateLimit-Remaining"] = str(limit - current_requests - 1)
-        response["X-RateLimit-Reset"] = str(int(time.time()) + 60)
+        if quota_result is not None and quota_result.remaining < result.remaining:
+            self.set_headers(response, quota_result, cost, quota.name)
+        else:
+            self.set_headers(response, result, cost, "default")
+        return response
 
+    def limited(self, result, cost, bucket, message):
+        response = JsonResponse({"error": "Rate limit exceeded", "message": message}, status=429)
+        response["Retry-After"] = str(max(1, result.reset - int(time.time())))
+        self.set_headers(response, result, cost, bucket)
         return response
 
+    def set_headers(self, response, result, cost, bucket):
+        response["X-RateLimit-Limit"] = str(result.limit)
+        response["X-RateLimit-Remaining"] = str(result.remaining)
+        response["X-RateLimit-Reset"] = str(result.reset)
+        response["X-RateLimit-Cost"] = str(cost)
+        response["X-RateLimit-Bucket"] = bucket
+
+    def get_identity(self, request):
+        """``(user_id, role)`` from the session user or the bearer token, else ``(None, None)``."""
+        if request.user.is_authenticated:
+            return request.user.id, getattr(request.user, "role", None)
+
+        token = resolve_request_token(request)
+        if token is None:
+            return None, None
+        return token_identity(token)
+
     def get_client_ip(self, request):
         x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
         if x_forwarded_for:
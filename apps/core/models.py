@@ -32,3 +32,84 @@ class UserTrackingModel(TimeStampedModel):
 
     class Meta:
         abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def _snapshot(self, attnames):
+        loaded = self.__dict__.setdefault("_loaded_values", {})
+        for attname in attnames:
+            if attname in self.__dict__:
+                loaded[attname] = self.__dict__[attname]
+
+    def get_dirty_fields(self):
+        """
+        Return ``{field_name: (old_value, new_value)}`` for fields changed since load.
+
+        Fields assigned without having been loaded count as dirty with an unknown
+        (``None``) old value. Returns ``None`` for instances that were never loaded
+        or saved, where every column has to be written anyway.
+        """
+        loaded = self.__dict__.get("_loaded_values")
+        if loaded is None:
+            return None
+
+        dirty = {}
+        for field in self._meta.concrete_fields:
+            if field.attname not in self.__dict__:
+                continue
+            new_value = self.__dict__[field.attname]
+            old_value = loaded.get(field.attname)
+            if field.attname not in loaded or old_value != new_value:
+                dirty[field.name] = (old_value, new_value)
+        return dirty
+
+    def save(self, *args, **kwargs):
+        dirty = None if self._state.adding else self.get_dirty_fields()
+        update_fields = kwargs.get("update_fields")
+
+        if dirty is not None and update_fields is None and not kwargs.get("force_insert"):
+            auto_now_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if getattr(field, "auto_now", False)
+            ]
+            kwargs["update_fields"] = [*dirty, *auto_now_fields]
+        elif dirty is not None and update_fields is not None:
+            dirty = {name: values for name, values in dirty.items() if name in update_fields}
+
+        self.saved_changes = dirty or {}
+        super().save(*args, **kwargs)
+
+        saved_fields = kwargs.get("update_fields")
+        self._snapshot(
+            field.attname
+            for field in self._meta.concrete_fields
+            if saved_fields is None or field.name in saved_fields
+        )
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        fields = kwargs.get("fields")
+        self._snapshot(
+            field.attname
+            for field in self._meta.concrete_fields
+            if fields is None or field.name in fields or field.attname in fields
+        )
+
+
+class RateLimitCounter(models.Model):
+    """Shared counter row used by ``apps.core.ratelimit.DatabaseBackend``."""
+
+    key = models.CharField(max_length=255, primary_key=True)
+    count = models.IntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = "rate_limit_counters"
+
+    def __str__(self):
+        return f"{self.key}={self.count}"
@@ -0,0 +1,161 @@
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on the full ordering tuple instead of an offset.
+
+    The view's ordering (including anything picked through ``OrderingFilter``) is
+    extended with ``tiebreaker_fields`` so every row has a unique position, and
+    each page is fetched with a ``WHERE (a, b, c) > (...)`` style predicate.
+    """
+
+    ordering = ("-created_on", "-id")
+    tiebreaker_fields = ("created_on", "id")
+    mode_query_param = "pagination"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        reverse, position = self.decode_cursor(request)
+
+        self.position = position
+
+        ordering = self.invert_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(queryset, ordering, position))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_previous = has_more
+            self.has_next = position is not None
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        get_cursor_ordering = getattr(view, "get_cursor_ordering", None)
+        ordering = get_cursor_ordering() if get_cursor_ordering else None
+        if not ordering:
+            ordering = super().get_ordering(request, queryset, view)
+        ordering = list(ordering)
+        field_names = {field.lstrip("-") for field in ordering}
+        descending = ordering[0].startswith("-") if ordering else True
+
+        for field in self.tiebreaker_fields:
+            if field not in field_names:
+                ordering.append(f"-{field}" if descending else field)
+
+        return tuple(ordering)
+
+    def invert_ordering(self, ordering):
+        return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in ordering)
+
+    def get_ordering_field(self, queryset, name):
+        """Model field or annotation output field that ``name`` orders on."""
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    def get_seek_filter(self, queryset, ordering, position):
+        if len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        values = []
+        for field, value in zip(ordering, position):
+            try:
+                values.append(self.get_ordering_field(queryset, field.lstrip("-")).to_python(value))
+            except (FieldDoesNotExist, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        seek = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition = Q(**{f"{name}__{lookup}": values[index]})
+            for prior_field, prior_value in zip(ordering[:index], values[:index]):
+                condition &= Q(**{prior_field.lstrip("-"): prior_value})
+            seek |= condition
+
+        return seek
+
+    def get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            return [self.encode_value(instance[field.lstrip("-")]) for field in ordering]
+        return [self.encode_value(getattr(instance, field.lstrip("-"))) for field in ordering]
+
+    def encode_value(self, value):
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        # An empty page (its rows were deleted after the cursor was issued) links
+        # back through the position it was requested from.
+        position = self.position
+        if self.page:
+            position = self.get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor((False, position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self.position
+        if self.page:
+            position = self.get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor((True, position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return False, None
+
+        try:
+            payload = json.loads(b64decode(encoded.encode("ascii")).decode("ascii"))
+            reverse = bool(payload["r"])
+            position = payload["p"]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+
+        return reverse, position
+
+    def encode_cursor(self, cursor):
+        reverse, position = cursor
+        payload = json.dumps({"r": int(reverse), "p": position}, separators=(",", ":"))
+        encoded = b64encode(payload.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            request.query_params.get(cls.mode_query_param) == "cursor"
+            or cls.cursor_query_param in request.query_params
+        )
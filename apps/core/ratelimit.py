@@ -0,0 +1,227 @@
+import functools
+import math
+import random
+import re
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import RateLimitCounter
+
+
+class CacheBackend:
+    """
+    Counters kept in a Django cache with ``add`` + ``incr``.
+
+    Both operations are atomic on Redis and Memcached, which is what makes the limits
+    hold across worker processes; ``LocMemCache`` is only shared within one process.
+    The cache is looked up on every call, since Django's cache connections are
+    per thread. Negative deltas (refunds) never create a key or push it below 0.
+    """
+
+    def __init__(self, alias=None):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias or settings.RATE_LIMIT_CACHE]
+
+    def incr(self, key, delta, ttl):
+        cache = self.cache
+        if delta < 0:
+            try:
+                count = cache.decr(key, -delta)
+            except ValueError:
+                # Expired already: there is nothing left to give back.
+                return 0
+            if count < 0:
+                cache.incr(key, -count)
+                count = 0
+            return count
+
+        cache.add(key, 0, ttl)
+        try:
+            return cache.incr(key, delta)
+        except ValueError:
+            # The key expired between add() and incr().
+            cache.add(key, delta, ttl)
+            return delta
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys)
+
+
+class DatabaseBackend:
+    """
+    Counters kept in the ``rate_limit_counters`` table.
+
+    Increments are single ``UPDATE ... SET count = count + n`` statements, so they are
+    atomic on every database Django supports. Refunds only touch existing rows and
+    stop at 0. Expired rows are purged occasionally by whichever request happens to
+    draw the short straw.
+    """
+
+    purge_probability = 0.01
+
+    def incr(self, key, delta, ttl):
+        counters = RateLimitCounter.objects.filter(key=key)
+        if delta < 0:
+            counters.update(count=Greatest(F("count") + delta, Value(0)))
+            return counters.values_list("count", flat=True).first() or 0
+
+        with transaction.atomic():
+            if not counters.update(count=F("count") + delta):
+                try:
+                    with transaction.atomic():
+                        RateLimitCounter.objects.create(
+                            key=key, count=delta, expires_at=timezone.now() + timedelta(seconds=ttl)
+                        )
+                except IntegrityError:
+                    counters.update(count=F("count") + delta)
+            count = counters.values_list("count", flat=True).get()
+
+        if random.random() < self.purge_probability:
+            RateLimitCounter.objects.filter(expires_at__lt=timezone.now()).delete()
+        return count
+
+    def get_many(self, keys):
+        return dict(
+            RateLimitCounter.objects.filter(
+                key__in=keys, expires_at__gte=timezone.now()
+            ).values_list("key", "count")
+        )
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int
+
+
+@functools.lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+class SlidingWindowRateLimiter:
+    """
+    Sliding-window counter limiter.
+
+    Each key keeps one counter per fixed window. The usage at any moment is the
+    current window's count plus the previous window's count weighted by how much of
+    it still overlaps the sliding window, which approximates a sliding log with two
+    integers per key and one atomic increment per request. Rejected requests give
+    their cost back so they do not extend the lockout.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        """The backend given to the constructor, else ``RATE_LIMIT_BACKEND`` as set now."""
+        if self._backend is not None:
+            return self._backend
+        return _load_backend(settings.RATE_LIMIT_BACKEND)
+
+    def _keys(self, key, window, now):
+        index = int(now // window)
+        return index, f"rl:{key}:{window}:{index}", f"rl:{key}:{window}:{index - 1}"
+
+    def hit(self, key, limit, window, cost=1, now=None):
+        now = time.time() if now is None else now
+        index, current_key, previous_key = self._keys(key, window, now)
+
+        count = self.backend.incr(current_key, cost, window * 2)
+        previous = self.backend.get_many([previous_key]).get(previous_key, 0)
+        overlap = 1 - (now - index * window) / window
+        used = previous * overlap + count
+
+        reset = (index + 1) * window
+        if used > limit:
+            self.backend.incr(current_key, -cost, window * 2)
+            return RateLimitResult(False, limit, max(0, int(limit - used + cost)), reset)
+        return RateLimitResult(True, limit, max(0, int(limit - used)), reset)
+
+    def refund(self, key, window, cost, now):
+        """Give back ``cost`` charged by a ``hit`` made at ``now``."""
+        _, current_key, _ = self._keys(key, window, now)
+        self.backend.incr(current_key, -cost, window * 2)
+
+
+rate_limiter = SlidingWindowRateLimiter()
+
+
+class Quota:
+    """
+    One entry of ``RATE_LIMIT_QUOTAS``.
+
+    A request matches when its URL name is in ``views`` or its path matches ``path``,
+    and its method is in ``methods`` (any method when omitted). A matching request is
+    charged ``cost`` units, plus ``cost_per_kb`` for each KiB of request body, against
+    the general request limit. When ``limits`` is set the quota also has its own
+    bucket of that many units per ``window`` seconds, per role.
+    """
+
+    def __init__(
+        self,
+        name,
+        views=(),
+        path=None,
+        methods=None,
+        cost=1,
+        cost_per_kb=0,
+        limits=None,
+        window=3600,
+    ):
+        self.name = name
+        self.views = set(views)
+        self.path = re.compile(path) if path else None
+        self.methods = {method.upper() for method in methods} if methods else None
+        self.cost = cost
+        self.cost_per_kb = cost_per_kb
+        self.limits = limits
+        self.window = window
+
+    def matches(self, request, url_name):
+        if self.methods is not None and request.method not in self.methods:
+            return False
+        if url_name is not None and url_name in self.views:
+            return True
+        return bool(self.path and self.path.search(request.path_info))
+
+    def cost_for(self, request):
+        try:
+            size = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            size = 0
+        return self.cost + math.ceil(size / 1024 * self.cost_per_kb)
+
+
+def load_quotas(config):
+    return [Quota(name, **options) for name, options in config.items()]
+
+
+def match_quota(quotas, request):
+    """First quota matching ``request``, or ``None``."""
+    if not quotas:
+        return None
+    try:
+        url_name = resolve(request.path_info).url_name
+    except Resolver404:
+        url_name = None
+    for quota in quotas:
+        if quota.matches(request, url_name):
+            return quota
+    return None
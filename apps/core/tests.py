@@ -1,3 +1,340 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.authentication.authentication import (
+    CachedJWTAuthentication,
+    resolve_request_token,
+    tokens_for_user,
+    user_cache,
+    verified_tokens,
+)
+from apps.authentication.models import User
+from apps.products.models import Product, ProductChangeLog
+
+from .checks import check_rate_limit_backend
+from .middleware import RateLimitMiddleware
+from .models import RateLimitCounter
+from .ratelimit import CacheBackend, DatabaseBackend, SlidingWindowRateLimiter, rate_limiter
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+SHARED = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": "/tmp",
+    },
+}
+
+
+@override_settings(DEBUG=False, CACHES=SHARED)
+class RateLimitBackendCheckTests(SimpleTestCase):
+    def check_ids(self):
+        return [message.id for message in check_rate_limit_backend(None)]
+
+    @override_settings(RATE_LIMIT_BACKEND="apps.core.ratelimit.CacheBackend", CACHES=LOCMEM)
+    def test_process_local_cache_warns(self):
+        self.assertEqual(self.check_ids(), ["core.W001"])
+
+    @override_settings(RATE_LIMIT_BACKEND="apps.core.ratelimit.CacheBackend", CACHES=LOCMEM)
+    def test_debug_skips_the_check(self):
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.check_ids(), [])
+
+    @override_settings(
+        RATE_LIMIT_BACKEND="apps.core.ratelimit.CacheBackend", RATE_LIMIT_CACHE="shared"
+    )
+    def test_shared_cache_passes(self):
+        self.assertEqual(self.check_ids(), [])
+
+    @override_settings(RATE_LIMIT_BACKEND="apps.core.ratelimit.DatabaseBackend")
+    def test_database_backend_warns(self):
+        self.assertEqual(self.check_ids(), ["core.W002"])
+
+
+@override_settings(
+    RATE_LIMIT_BACKEND="apps.core.ratelimit.CacheBackend", RATE_LIMIT_CACHE="default"
+)
+class RateLimitCostTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.middleware = RateLimitMiddleware(lambda request: HttpResponse("ok"))
+
+    def bulk_request(self, size):
+        request = RequestFactory().post(
+            "/api/products/bulk_create/", content_type="application/json", CONTENT_LENGTH=size
+        )
+        request.user = SimpleNamespace(is_authenticated=True, id=1, role="admin")
+        return request
+
+    def test_oversized_body_costs_at_most_one_bucket(self):
+        response = self.middleware(self.bulk_request(3 * 1024 * 1024))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-RateLimit-Cost"], "1000")
+        self.assertEqual(response["X-RateLimit-Remaining"], "0")
+
+        response = self.middleware(self.bulk_request(3 * 1024 * 1024))
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    def test_small_body_is_charged_by_size(self):
+        response = self.middleware(self.bulk_request(10 * 1024))
+        self.assertEqual(response["X-RateLimit-Cost"], "10")
+
+
+class DirtyFieldTrackingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("admin@example.com", "admin", "password123!")
+        created = Product.objects.create(
+            title="Lamp",
+            description="A long description",
+            price=Decimal("10.00"),
+            ssn="SSN-1",
+            created_by=self.user,
+            updated_by=self.user,
+        )
+        self.product = Product.objects.get(pk=created.pk)
+
+    def update_sql(self, product, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            product.save(**kwargs)
+        updates = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1, updates)
+        return updates[0].split(" WHERE ")[0]
+
+    def test_loaded_values_are_snapshotted(self):
+        self.assertEqual(self.product._loaded_values["title"], "Lamp")
+        self.assertEqual(self.product.get_dirty_fields(), {})
+
+        self.product.title = "Desk lamp"
+        self.assertEqual(self.product.get_dirty_fields(), {"title": ("Lamp", "Desk lamp")})
+
+    def test_unloaded_fields_are_dirty_when_assigned(self):
+        product = Product.objects.only("id", "title").get(pk=self.product.pk)
+        product.description = "Short"
+        self.assertEqual(product.get_dirty_fields(), {"description": (None, "Short")})
+        self.assertIsNone(Product(title="New").get_dirty_fields())
+
+    def test_save_writes_only_dirty_columns(self):
+        self.product.title = "Desk lamp"
+        sql = self.update_sql(self.product)
+
+        self.assertIn('"title"', sql)
+        self.assertIn('"updated_on"', sql)
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('"price"', sql)
+        self.assertEqual(self.product.get_dirty_fields(), {})
+        self.assertEqual(Product.objects.get(pk=self.product.pk).title, "Desk lamp")
+
+    def test_clean_save_only_touches_the_timestamp(self):
+        sql = self.update_sql(self.product)
+
+        self.assertEqual(self.product.saved_changes, {})
+        self.assertEqual(sql.count(" = "), 1)
+        self.assertIn('"updated_on"', sql)
+
+    def test_explicit_update_fields_narrow_the_diff(self):
+        self.product.title = "Desk lamp"
+        self.product.price = Decimal("12.00")
+        sql = self.update_sql(self.product, update_fields=["price", "updated_on"])
+
+        self.assertNotIn('"title"', sql)
+        self.assertEqual(
+            self.product.saved_changes, {"price": (Decimal("10.00"), Decimal("12.00"))}
+        )
+        self.assertEqual(self.product.get_dirty_fields(), {"title": ("Lamp", "Desk lamp")})
+
+    def test_change_log_records_the_saved_diff(self):
+        self.product.price = Decimal("12.50")
+        self.product.description = "A long description"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+
+        log = ProductChangeLog.objects.get(
+            product=self.product, action=ProductChangeLog.ACTION_UPDATED
+        )
+        self.assertEqual(log.changes, {"price": {"old": "10.00", "new": "12.50"}})
+
+
+class SlidingWindowTests:
+    """Shared by the cache and database backends; ``backend`` is set by subclasses."""
+
+    window = 60
+    start = 1000 * 60  # the start of a window
+
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowRateLimiter(self.backend)
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        first = self.limiter.hit("k", 10, self.window, cost=8, now=self.start + 30)
+        self.assertEqual((first.allowed, first.remaining), (True, 2))
+
+        # 15s into the next window, 75% of the previous window still counts: 6 used.
+        second = self.limiter.hit("k", 10, self.window, cost=3, now=self.start + 75)
+        self.assertEqual((second.allowed, second.remaining), (True, 1))
+        rejected = self.limiter.hit("k", 10, self.window, cost=2, now=self.start + 75)
+        self.assertFalse(rejected.allowed)
+        self.assertEqual(rejected.reset, self.start + 2 * self.window)
+
+        # 45s in, only 25% (2 units) of the previous window is left, plus the 3 charged.
+        later = self.limiter.hit("k", 10, self.window, cost=1, now=self.start + 105)
+        self.assertEqual((later.allowed, later.remaining), (True, 4))
+
+    def test_rejected_hits_are_refunded(self):
+        now = self.start + 1
+        for _ in range(3):
+            self.limiter.hit("k", 3, self.window, now=now)
+        self.assertFalse(self.limiter.hit("k", 3, self.window, now=now).allowed)
+        key = f"rl:k:{self.window}:{int(now // self.window)}"
+        self.assertEqual(self.backend.get_many([key])[key], 3)
+
+    def test_refund_of_expired_counter_stays_at_zero(self):
+        self.assertEqual(self.backend.incr("rl:gone", -5, self.window), 0)
+        self.assertEqual(self.backend.get_many(["rl:gone"]).get("rl:gone", 0), 0)
+
+        self.backend.incr("rl:low", 2, self.window)
+        self.assertEqual(self.backend.incr("rl:low", -5, self.window), 0)
+        self.assertEqual(self.backend.incr("rl:low", 1, self.window), 1)
+
+
+class CacheBackendTests(SlidingWindowTests, SimpleTestCase):
+    backend = CacheBackend()
+
+
+class DatabaseBackendTests(SlidingWindowTests, TestCase):
+    backend = DatabaseBackend()
+
+    def test_counters_are_rows_and_expired_rows_are_ignored(self):
+        self.backend.incr("rl:row", 4, self.window)
+        self.assertEqual(RateLimitCounter.objects.get(key="rl:row").count, 4)
+
+        RateLimitCounter.objects.filter(key="rl:row").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(self.backend.get_many(["rl:row"]), {})
+
+    @override_settings(RATE_LIMIT_BACKEND="apps.core.ratelimit.DatabaseBackend")
+    def test_module_limiter_follows_settings(self):
+        self.assertIsInstance(rate_limiter.backend, DatabaseBackend)
+        rate_limiter.hit("k", 10, self.window)
+        self.assertTrue(RateLimitCounter.objects.exists())
+
+
+@override_settings(
+    RATE_LIMIT_BACKEND="apps.core.ratelimit.CacheBackend", RATE_LIMITS={"anonymous": 3}
+)
+class RateLimitResponseTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.middleware = RateLimitMiddleware(lambda request: HttpResponse("ok"))
+
+    def anonymous_request(self):
+        request = RequestFactory().get("/api/products/")
+        request.user = AnonymousUser()
+        return request
+
+    def test_over_the_limit_gets_429_with_retry_after(self):
+        for remaining in (2, 1, 0):
+            response = self.middleware(self.anonymous_request())
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["X-RateLimit-Remaining"], str(remaining))
+
+        response = self.middleware(self.anonymous_request())
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(json.loads(response.content)["error"], "Rate limit exceeded")
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        self.assertLessEqual(int(response["Retry-After"]), 60)
+        self.assertEqual(response["X-RateLimit-Bucket"], "default")
+
+
+@override_settings(
+    RATE_LIMIT_BACKEND="apps.core.ratelimit.CacheBackend",
+    RATE_LIMITS={"admin": 5, "user": 4, "anonymous": 3},
+)
+class RateLimitIdentityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        verified_tokens.clear()
+        self.middleware = RateLimitMiddleware(lambda request: HttpResponse("ok"))
+        self.admin = User.objects.create_user(
+            "admin@example.com", "admin", "password123!", role="admin"
+        )
+        self.user = User.objects.create_user("user@example.com", "user", "password123!")
+
+    def bearer_request(self, token):
+        request = RequestFactory().get("/api/products/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        request.user = AnonymousUser()
+        return request
+
+    def test_bearer_token_is_resolved_and_left_on_the_request(self):
+        access = tokens_for_user(self.user).access_token
+        request = self.bearer_request(access)
+
+        response = self.middleware(request)
+        self.assertEqual(response["X-RateLimit-Limit"], "4")
+        self.assertEqual(str(request.jwt_token["user_id"]), str(self.user.id))
+        self.assertEqual(resolve_request_token(request), request.jwt_token)
+
+    def test_invalid_token_is_limited_as_anonymous(self):
+        request = self.bearer_request("not-a-token")
+
+        response = self.middleware(request)
+        self.assertEqual(response["X-RateLimit-Limit"], "3")
+        self.assertIsNone(request.jwt_token)
+
+    def test_limits_follow_the_callers_role(self):
+        anonymous = RequestFactory().get("/api/products/")
+        anonymous.user = AnonymousUser()
+        session_admin = RequestFactory().get("/api/products/")
+        session_admin.user = self.admin
+        requests = {
+            "3": anonymous,
+            "4": self.bearer_request(RefreshToken.for_user(self.user).access_token),
+            "5": self.bearer_request(tokens_for_user(self.admin).access_token),
+        }
+        for limit, request in requests.items():
+            self.assertEqual(self.middleware(request)["X-RateLimit-Limit"], limit)
+        self.assertEqual(self.middleware(session_admin)["X-RateLimit-Limit"], "5")
+
+    def test_role_without_claim_comes_from_the_user(self):
+        access = RefreshToken.for_user(self.admin).access_token
+        self.assertNotIn("role", access.payload)
+
+        response = self.middleware(self.bearer_request(access))
+        self.assertEqual(response["X-RateLimit-Limit"], "5")
+
+    def test_token_is_verified_once_per_request(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.user).access_token}")
+        verify = CachedJWTAuthentication.get_validated_token
+        with patch.object(
+            CachedJWTAuthentication, "get_validated_token", autospec=True, side_effect=verify
+        ) as validated:
+            response = client.get("/api/auth/profile/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["email"], self.user.email)
+        self.assertEqual(validated.call_count, 1)
+        self.assertEqual(response["X-RateLimit-Limit"], "4")
+
+    def test_invalid_token_is_still_rejected_by_drf(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+
+        response = client.get("/api/auth/profile/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["X-RateLimit-Limit"], "3")
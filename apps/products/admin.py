@@ -1,7 +1,13 @@
+from functools import partial
+
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
 from django.utils.html import format_html
 
+from .cache import catalog_version
 from .models import Product, ProductChangeLog
+from .suggest import title_index
 
 
 @admin.register(Product)
@@ -71,7 +77,7 @@ class ProductAdmin(admin.ModelAdmin):
     )
     actions = ["disable_products", "enable_products"]
 
-    @admin.display(description="Final Price")
+    @admin.display(description="Final Price", ordering="final_price")
     def final_price_display(self, obj):
         if obj.discount > 0:
             return format_html(
@@ -89,7 +95,13 @@ class ProductAdmin(admin.ModelAdmin):
 
     @admin.action(description="Disable selected products")
     def disable_products(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        with transaction.atomic():
+            ids = list(queryset.values_list("pk", flat=True))
+            updated = Product.objects.filter(pk__in=ids).update(
+                is_active=False, updated_on=timezone.now()
+            )
+            transaction.on_commit(partial(title_index.remove_many, ids))
+            transaction.on_commit(catalog_version.bump)
         self.message_user(
             request,
             f"{updated} product(s) were successfully disabled.",
@@ -97,7 +109,15 @@ class ProductAdmin(admin.ModelAdmin):
 
     @admin.action(description="Enable selected products")
     def enable_products(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        with transaction.atomic():
+            rows = list(queryset.values_list("pk", "title"))
+            updated = Product.objects.filter(pk__in=[pk for pk, _ in rows]).update(
+                is_active=True, updated_on=timezone.now()
+            )
+            transaction.on_commit(
+                partial(title_index.update_many, [(pk, title, True) for pk, title in rows])
+            )
+            transaction.on_commit(catalog_version.bump)
         self.message_user(
             request,
             f"{updated} product(s) were successfully enabled.",
@@ -131,6 +151,8 @@ class ProductChangeLogAdmin(admin.ModelAdmin):
         "changed_by__username",
     )
     ordering = ("-changed_at",)
+    list_select_related = ("product", "changed_by")
+    show_full_result_count = False
     readonly_fields = (
         "product",
         "action",
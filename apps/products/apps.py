@@ -6,5 +6,6 @@ class ProductsConfig(AppConfig):
     name = "apps.products"
 
     def ready(self):
-        """Import signals when app is ready."""
+        """Import signals and checks when app is ready."""
+        import apps.products.checks  # noqa: F401
         import apps.products.signals  # noqa: F401
@@ -0,0 +1,109 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class CatalogVersion:
+    """
+    Catalog-wide version number kept in the shared Django cache.
+
+    Every committed product write bumps it, which invalidates every cached product
+    response at once without scanning keys.
+    """
+
+    key = "products:catalog_version"
+
+    def get(self):
+        version = cache.get(self.key)
+        if version is None:
+            cache.add(self.key, 1, None)
+            version = cache.get(self.key, 1)
+        return version
+
+    def bump(self):
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            cache.add(self.key, 1, None)
+            return cache.get(self.key, 1)
+
+
+catalog_version = CatalogVersion()
+
+
+def request_digest(action, role, query_params, kwargs, *extra):
+    params = sorted((key, tuple(query_params.getlist(key))) for key in query_params)
+    raw = repr((action, role, params, sorted(kwargs.items()), *extra))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Per-process LRU of rendered product responses, capped at ``max_bytes``.
+
+    Entries remember the catalog version they were rendered at and are ignored once
+    the version moves on or ``PRODUCT_RESPONSE_CACHE_SECONDS`` have passed.
+    """
+
+    entry_overhead = 512
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def make_key(self, action, role, query_params, kwargs):
+        return request_digest(action, role, query_params, kwargs)
+
+    def _cost(self, entry):
+        return len(entry["content"]) + self.entry_overhead
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= self._cost(entry)
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["version"] != version or entry["expires"] <= time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, version, content, content_type, etag=None, last_modified=None):
+        entry = {
+            "version": version,
+            "content": content,
+            "content_type": content_type,
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires": time.monotonic() + settings.PRODUCT_RESPONSE_CACHE_SECONDS,
+        }
+        cost = self._cost(entry)
+        if cost > self.max_bytes:
+            return
+
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = entry
+            self._size += cost
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= self._cost(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+response_cache = ResponseCache(settings.PRODUCT_RESPONSE_CACHE_MAX_BYTES)
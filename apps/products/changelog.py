@@ -0,0 +1,175 @@
+import atexit
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .models import ProductChangeLog
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeLogWriter:
+    """
+    Background thread that bulk inserts change-log batches handed to it.
+
+    Batches go through a bounded queue; when it stays full for
+    ``PRODUCT_CHANGE_LOG_QUEUE_TIMEOUT`` seconds the caller writes the batch itself,
+    so a slow database pushes back on request threads instead of growing memory.
+    If the thread has died, the next ``submit`` starts a new one, which picks up
+    whatever was still queued.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=settings.PRODUCT_CHANGE_LOG_QUEUE_SIZE)
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._ensure_running()
+        atexit.register(self.close)
+
+    def _ensure_running(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="change-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, entries):
+        self._ensure_running()
+        try:
+            self._queue.put(entries, timeout=settings.PRODUCT_CHANGE_LOG_QUEUE_TIMEOUT)
+        except queue.Full:
+            write_entries(entries)
+
+    def close(self, timeout=5):
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            entries = self._queue.get()
+            if entries is None:
+                return
+
+            while len(entries) < settings.PRODUCT_CHANGE_LOG_BATCH_SIZE:
+                try:
+                    more = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    self._write(entries)
+                    return
+                entries = entries + more
+
+            self._write(entries)
+
+    def _write(self, entries):
+        try:
+            write_entries(entries)
+        except Exception:
+            logger.exception("Failed to write %d product change log(s)", len(entries))
+        finally:
+            close_old_connections()
+
+
+def write_entries(entries):
+    """
+    Insert ``entries`` with one ``bulk_create``, falling back to one insert per entry
+    when that fails, so a bad entry is logged and dropped without losing the rest.
+    """
+    try:
+        with transaction.atomic():
+            ProductChangeLog.objects.bulk_create(
+                entries, batch_size=settings.PRODUCT_CHANGE_LOG_BATCH_SIZE
+            )
+        return
+    except Exception:
+        logger.warning(
+            "Bulk write of %d product change log(s) failed; retrying one at a time",
+            len(entries),
+            exc_info=True,
+        )
+
+    for entry in entries:
+        entry.pk = None
+        try:
+            with transaction.atomic():
+                entry.save(force_insert=True)
+        except Exception:
+            logger.exception("Failed to write change log for product %s", entry.product_id)
+
+
+class ChangeLogRecorder:
+    """
+    Write-behind recorder for ``ProductChangeLog`` entries.
+
+    Each entry is released by ``transaction.on_commit``, so entries for changes that
+    roll back (including partial savepoint rollbacks) are never written. Inside a
+    ``buffer()`` scope, which ``ChangeLogBufferMiddleware`` opens for every request,
+    committed entries are collected and inserted with one ``bulk_create`` when the
+    scope ends. Outside a scope they are written as soon as their transaction commits.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    @property
+    def writer(self):
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = ChangeLogWriter()
+        return self._writer
+
+    @contextmanager
+    def buffer(self):
+        if getattr(self._local, "pending", None) is not None:
+            yield
+            return
+
+        self._local.pending = []
+        try:
+            yield
+        finally:
+            pending, self._local.pending = self._local.pending, None
+            self.flush(pending)
+
+    def record(self, entry):
+        transaction.on_commit(partial(self._committed, entry))
+
+    def _committed(self, entry):
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            self.flush([entry])
+            return
+
+        pending.append(entry)
+        if len(pending) >= settings.PRODUCT_CHANGE_LOG_BATCH_SIZE:
+            self.flush(pending[:])
+            pending.clear()
+
+    def flush(self, entries):
+        # Entries are only flushed once their transaction has committed, so a failure
+        # here must not turn an already committed change into an error response.
+        if not entries:
+            return
+        try:
+            if settings.PRODUCT_CHANGE_LOG_ASYNC:
+                self.writer.submit(entries)
+            else:
+                write_entries(entries)
+        except Exception:
+            logger.exception("Failed to write %d product change log(s)", len(entries))
+
+
+change_log_recorder = ChangeLogRecorder()
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import Error, Tags, register
+
+from apps.core.checks import is_process_local
+
+
+@register(Tags.caches)
+def check_response_cache(app_configs, **kwargs):
+    """
+    Cached product responses are invalidated by the catalog version in the default
+    cache. When that cache is per process, a write only bumps the version in the
+    worker that made it and every other worker keeps serving the old body.
+    """
+    if settings.DEBUG or not settings.PRODUCT_RESPONSE_CACHE_ENABLED:
+        return []
+    if is_process_local(DEFAULT_CACHE_ALIAS):
+        return [
+            Error(
+                "PRODUCT_RESPONSE_CACHE_ENABLED needs a shared default cache, but it is a "
+                "LocMemCache.",
+                hint="Configure a Redis or Memcached default cache, or set "
+                "PRODUCT_RESPONSE_CACHE_ENABLED=False.",
+                id="products.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,270 @@
+import csv
+import json
+import zipfile
+from itertools import chain, islice
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_CONTENT_TYPE = "text/csv"
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+EXPORT_HEADERS = [
+    "ID",
+    "Title",
+    "Description",
+    "Price",
+    "Discount (%)",
+    "Final Price",
+    "SSN",
+    "Is Active",
+    "Created On",
+    "Updated On",
+]
+
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "description",
+    "price",
+    "discount",
+    "final_price",
+    "ssn",
+    "is_active",
+    "created_on",
+    "updated_on",
+]
+
+MAX_COLUMN_WIDTH = 50
+WIDTH_SAMPLE_SIZE = 500
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def export_queryset(queryset):
+    return queryset.select_related(None).only(*EXPORT_FIELDS)
+
+
+def product_export_row(product):
+    return [
+        str(product.id),
+        product.title,
+        product.description,
+        float(product.price),
+        float(product.discount),
+        float(product.final_price),
+        product.ssn,
+        "Yes" if product.is_active else "No",
+        product.created_on.strftime("%Y-%m-%d %H:%M:%S"),
+        product.updated_on.strftime("%Y-%m-%d %H:%M:%S"),
+    ]
+
+
+def product_export_record(product):
+    return {
+        "id": str(product.id),
+        "title": product.title,
+        "description": product.description,
+        "price": str(product.price),
+        "discount": str(product.discount),
+        "final_price": str(product.final_price),
+        "ssn": product.ssn,
+        "is_active": product.is_active,
+        "created_on": _isoformat(product.created_on),
+        "updated_on": _isoformat(product.updated_on),
+    }
+
+
+def _isoformat(value):
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def iter_export_products(queryset, chunk_size=None):
+    chunk_size = chunk_size or settings.PRODUCT_EXPORT_CHUNK_SIZE
+    return export_queryset(queryset).iterator(chunk_size=chunk_size)
+
+
+def column_widths(headers, sample_rows):
+    widths = [len(str(header)) for header in headers]
+    for row in sample_rows:
+        for index, value in enumerate(row):
+            widths[index] = max(widths[index], len(str(value)))
+    return [min(width + 2, MAX_COLUMN_WIDTH) for width in widths]
+
+
+SPREADSHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+PACKAGE_RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_RELS_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        f'<Relationships xmlns="{PACKAGE_RELS_NS}">'
+        f'<Relationship Id="rId1" Type="{OFFICE_RELS_NS}/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        f'<Relationships xmlns="{PACKAGE_RELS_NS}">'
+        f'<Relationship Id="rId1" Type="{OFFICE_RELS_NS}/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{OFFICE_RELS_NS}/styles" Target="styles.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/styles.xml": (
+        f'<styleSheet xmlns="{SPREADSHEET_NS}">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+        "</cellStyleXfs>"
+        '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        "</cellXfs>"
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        "</styleSheet>"
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value!r}</v></c>"
+    text = escape(ILLEGAL_CHARACTERS_RE.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_sheet_lines(headers, rows, widths):
+    yield f'{XML_DECLARATION}<worksheet xmlns="{SPREADSHEET_NS}"><cols>'
+    for index, width in enumerate(widths, start=1):
+        yield f'<col min="{index}" max="{index}" width="{width}" customWidth="1"/>'
+    yield "</cols><sheetData>"
+    for number, row in enumerate(chain([headers], rows), start=1):
+        yield f'<row r="{number}">{"".join(_xlsx_cell(value) for value in row)}</row>'
+    yield "</sheetData></worksheet>"
+
+
+class _ZipSink:
+    """Unseekable file that collects what ``zipfile`` writes until it is drained."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def xlsx_blocks(rows, headers=EXPORT_HEADERS, title="Products"):
+    """
+    Yield an XLSX workbook as it is built, one compressed block at a time.
+
+    The worksheet XML is written with inline strings straight into a zip stream, so
+    the first bytes go out once ``WIDTH_SAMPLE_SIZE`` rows have been read to size
+    the columns, and memory use does not grow with the row count.
+    """
+    rows = iter(rows)
+    sample = list(islice(rows, WIDTH_SAMPLE_SIZE))
+    widths = column_widths(headers, sample)
+    workbook = (
+        f'<workbook xmlns="{SPREADSHEET_NS}" xmlns:r="{OFFICE_RELS_NS}"><sheets>'
+        f'<sheet name={quoteattr(title)} sheetId="1" r:id="rId1"/>'
+        "</sheets></workbook>"
+    )
+
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, XML_DECLARATION + content)
+        archive.writestr("xl/workbook.xml", XML_DECLARATION + workbook)
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            lines = _xlsx_sheet_lines(headers, chain(sample, rows), widths)
+            for block in _buffered(lines):
+                sheet.write(block)
+                if sink.size >= STREAM_BLOCK_SIZE:
+                    yield sink.drain()
+    yield sink.drain()
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _buffered(lines):
+    """Join small text fragments into blocks so the server isn't flushing per row."""
+    parts = []
+    size = 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= STREAM_BLOCK_SIZE:
+            yield "".join(parts).encode("utf-8")
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+def csv_lines(products):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for product in products:
+        yield writer.writerow(product_export_row(product))
+
+
+def ndjson_lines(products):
+    for product in products:
+        yield json.dumps(product_export_record(product), ensure_ascii=False) + "\n"
+
+
+EXPORT_LINES = {
+    "csv": csv_lines,
+    "ndjson": ndjson_lines,
+}
+
+
+def write_export(export_format, products, fileobj):
+    for block in export_blocks(export_format, products):
+        fileobj.write(block)
+
+
+def export_blocks(export_format, products):
+    if export_format == "xlsx":
+        return xlsx_blocks(product_export_row(product) for product in products)
+    return _buffered(EXPORT_LINES[export_format](products))
+
+
+def stream_export(export_format, queryset):
+    return export_blocks(export_format, iter_export_products(queryset))
@@ -1,6 +1,9 @@
 import django_filters
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import OrderingFilter, SearchFilter
 
-from .models import Product
+from .models import Product, ProductChangeLog
+from .search import full_text_search_supported, search_products
 
 
 class ProductFilter(django_filters.FilterSet):
@@ -9,6 +12,8 @@ class ProductFilter(django_filters.FilterSet):
     description = django_filters.CharFilter(lookup_expr="icontains")
     price_min = django_filters.NumberFilter(field_name="price", lookup_expr="gte")
     price_max = django_filters.NumberFilter(field_name="price", lookup_expr="lte")
+    final_price_min = django_filters.NumberFilter(field_name="final_price", lookup_expr="gte")
+    final_price_max = django_filters.NumberFilter(field_name="final_price", lookup_expr="lte")
     created_on_after = django_filters.DateTimeFilter(field_name="created_on", lookup_expr="gte")
     created_on_before = django_filters.DateTimeFilter(field_name="created_on", lookup_expr="lte")
     updated_on_after = django_filters.DateTimeFilter(field_name="updated_on", lookup_expr="gte")
@@ -20,3 +25,46 @@ class ProductFilter(django_filters.FilterSet):
             "is_active": ["exact"],
             "ssn": ["exact"],
         }
+
+
+class ProductChangeLogFilter(django_filters.FilterSet):
+    action = django_filters.MultipleChoiceFilter(choices=ProductChangeLog.ACTION_CHOICES)
+    changed_at_after = django_filters.IsoDateTimeFilter(field_name="changed_at", lookup_expr="gte")
+    changed_at_before = django_filters.IsoDateTimeFilter(field_name="changed_at", lookup_expr="lt")
+
+    class Meta:
+        model = ProductChangeLog
+        fields = ["action"]
+
+
+class ProductSearchFilter(SearchFilter):
+    """``SearchFilter`` that uses the product full-text index when the database has one."""
+
+    def filter_queryset(self, request, queryset, view):
+        if not full_text_search_supported(queryset):
+            return super().filter_queryset(request, queryset, view)
+
+        query = " ".join(self.get_search_terms(request))
+        if not query:
+            return queryset
+        return search_products(queryset, query)
+
+
+class ProductQueryMixin:
+    """
+    Filter, search and ordering options for product querysets.
+
+    Shared by ``ProductViewSet`` and export jobs, which rebuild the same queryset
+    from stored query parameters without going through a view.
+    """
+
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
+    filterset_class = ProductFilter
+    search_fields = ["title", "description"]
+    ordering_fields = ["created_on", "updated_on", "price", "final_price", "title"]
+    ordering = ["-created_on"]
+
+    def filter_queryset(self, queryset):
+        for backend in list(self.filter_backends):
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import logging
+import tempfile
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Count, F, Max, Q
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from rest_framework.request import Request
+
+from .exports import iter_export_products, write_export
+from .filters import ProductQueryMixin
+from .models import Product, ProductExportJob
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 1000
+
+
+def normalize_params(params):
+    normalized = {}
+    for key, value in params.items():
+        if key == "format":
+            continue
+        values = value if isinstance(value, list) else [value]
+        normalized[key] = sorted(str(item) for item in values)
+    return dict(sorted(normalized.items()))
+
+
+def catalog_data_version():
+    stats = Product.objects.aggregate(last_updated=Max("updated_on"), total=Count("id"))
+    last_updated = stats["last_updated"].isoformat() if stats["last_updated"] else ""
+    return f"{stats['total']}:{last_updated}"
+
+
+def export_fingerprint(export_format, params, data_version=None):
+    payload = {
+        "format": export_format,
+        "params": normalize_params(params),
+        "version": data_version if data_version is not None else catalog_data_version(),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ExportQuery(ProductQueryMixin):
+    def __init__(self, request):
+        self.request = request
+
+
+def filtered_export_queryset(params, user=None):
+    """Rebuild the queryset ``ProductViewSet.export`` would produce for ``params``."""
+    http_request = HttpRequest()
+    http_request.method = "GET"
+    http_request.GET = QueryDict(urlencode(normalize_params(params), doseq=True))
+    request = Request(http_request)
+    if user is not None:
+        request.user = user
+    return ExportQuery(request).filter_queryset(Product.objects.all())
+
+
+def find_completed_job(fingerprint):
+    completed = ProductExportJob.objects.filter(
+        fingerprint=fingerprint, status=ProductExportJob.STATUS_COMPLETED
+    )
+    for job in completed.order_by("-finished_on"):
+        if job.file and job.file.storage.exists(job.file.name):
+            return job
+    return None
+
+
+def reuse_job_result(job, source):
+    job.status = ProductExportJob.STATUS_COMPLETED
+    job.file = source.file.name
+    job.total_rows = source.total_rows
+    job.processed_rows = source.processed_rows
+    job.started_on = job.started_on or timezone.now()
+    job.finished_on = timezone.now()
+
+
+def create_export_job(user, export_format, params):
+    params = normalize_params(params)
+    fingerprint = export_fingerprint(export_format, params)
+
+    own_job = (
+        ProductExportJob.objects.filter(requested_by=user, fingerprint=fingerprint)
+        .exclude(status=ProductExportJob.STATUS_FAILED)
+        .order_by("-created_on")
+        .first()
+    )
+    if own_job is not None and (
+        own_job.status != ProductExportJob.STATUS_COMPLETED
+        or (own_job.file and own_job.file.storage.exists(own_job.file.name))
+    ):
+        return own_job
+
+    job = ProductExportJob(
+        requested_by=user, format=export_format, params=params, fingerprint=fingerprint
+    )
+    source = find_completed_job(fingerprint)
+    if source is not None:
+        reuse_job_result(job, source)
+    job.save()
+    return job
+
+
+def claim_next_job():
+    pending = ProductExportJob.objects.filter(status=ProductExportJob.STATUS_PENDING)
+    for job_id in pending.order_by("created_on").values_list("id", flat=True)[:10]:
+        claimed = ProductExportJob.objects.filter(
+            pk=job_id, status=ProductExportJob.STATUS_PENDING
+        ).update(
+            status=ProductExportJob.STATUS_RUNNING,
+            started_on=timezone.now(),
+            heartbeat_on=timezone.now(),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return ProductExportJob.objects.get(pk=job_id)
+    return None
+
+
+def _track_progress(job, products):
+    processed = 0
+    for product in products:
+        yield product
+        processed += 1
+        if processed % PROGRESS_INTERVAL == 0:
+            ProductExportJob.objects.filter(pk=job.pk).update(
+                processed_rows=processed, heartbeat_on=timezone.now()
+            )
+    job.processed_rows = processed
+
+
+def recover_stale_jobs():
+    """
+    Requeue running jobs whose worker stopped sending heartbeats.
+
+    Jobs that have already been claimed ``PRODUCT_EXPORT_JOB_MAX_ATTEMPTS`` times are
+    failed instead, so an export that keeps killing its worker is not retried forever.
+    Returns ``(requeued, failed)``.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.PRODUCT_EXPORT_JOB_STALE_SECONDS)
+    stale = ProductExportJob.objects.filter(
+        Q(heartbeat_on__lt=cutoff) | Q(heartbeat_on__isnull=True, started_on__lt=cutoff),
+        status=ProductExportJob.STATUS_RUNNING,
+    )
+    max_attempts = settings.PRODUCT_EXPORT_JOB_MAX_ATTEMPTS
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=ProductExportJob.STATUS_FAILED,
+        error="Export worker stopped responding",
+        finished_on=now,
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=ProductExportJob.STATUS_PENDING, processed_rows=0
+    )
+    if requeued or failed:
+        logger.warning("Recovered stale export jobs: %s requeued, %s failed", requeued, failed)
+    return requeued, failed
+
+
+def finish_job(job):
+    """
+    Save the outcome of a claimed job, unless it was requeued while it ran.
+
+    Returns ``False`` when another worker now owns the job; the caller's result is
+    then discarded.
+    """
+    job.finished_on = timezone.now()
+    finished = ProductExportJob.objects.filter(
+        pk=job.pk, status=ProductExportJob.STATUS_RUNNING, attempts=job.attempts
+    ).update(
+        status=job.status,
+        file=job.file.name or None,
+        error=job.error,
+        total_rows=job.total_rows,
+        processed_rows=job.processed_rows,
+        started_on=job.started_on,
+        finished_on=job.finished_on,
+    )
+    if not finished:
+        logger.warning("Export job %s was requeued while running; discarding result", job.pk)
+    return bool(finished)
+
+
+def run_export_job(job):
+    source = find_completed_job(job.fingerprint)
+    if source is not None:
+        reuse_job_result(job, source)
+        finish_job(job)
+        return job
+
+    try:
+        queryset = filtered_export_queryset(job.params, user=job.requested_by)
+        job.total_rows = queryset.count()
+        ProductExportJob.objects.filter(pk=job.pk).update(total_rows=job.total_rows)
+
+        with tempfile.TemporaryFile() as buffer:
+            products = _track_progress(job, iter_export_products(queryset))
+            write_export(job.format, products, buffer)
+            buffer.seek(0)
+            filename = f"products_{job.fingerprint[:16]}.{job.format}"
+            job.file.save(filename, File(buffer), save=False)
+    except Exception as exc:
+        logger.exception("Product export job %s failed", job.pk)
+        job.status = ProductExportJob.STATUS_FAILED
+        job.error = str(exc)
+    else:
+        job.status = ProductExportJob.STATUS_COMPLETED
+
+    if not finish_job(job) and job.file:
+        job.file.delete(save=False)
+    return job
+
+
+def process_pending_jobs(limit=None):
+    recover_stale_jobs()
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_export_job(job)
+        processed += 1
+    return processed
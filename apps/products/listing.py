@@ -0,0 +1,86 @@
+import decimal
+
+from django.db.models import DateTimeField, F, Func, IntegerField, Subquery
+from rest_framework import serializers
+
+VALIDATOR_FIELDS = ("validator_last_modified", "validator_count")
+
+
+def _decimal_converter(field):
+    if field.decimal_places is None or field.normalize_output or field.localize:
+        return field.to_representation
+    if not getattr(field, "coerce_to_string", True):
+        return field.to_representation
+
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return f"{value.quantize(exponent, rounding=rounding, context=context):f}"
+
+    return convert
+
+
+def _field_converter(field):
+    if isinstance(field, serializers.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, serializers.UUIDField) and field.uuid_format == "hex_verbose":
+        return str
+    if isinstance(field, serializers.BooleanField):
+        return bool
+    return field.to_representation
+
+
+def compile_row_converter(serializer):
+    """
+    Turn ``values()`` rows into what ``serializer`` would output for the same
+    objects, without building model instances or walking DRF's per-field machinery.
+
+    Converters are picked once per field from the serializer's own field
+    definitions; anything without a fast equivalent uses ``to_representation``.
+    """
+    fields = [
+        (field.field_name, field.source, _field_converter(field))
+        for field in serializer._readable_fields
+    ]
+
+    def convert(row):
+        return {
+            name: None if row[source] is None else converter(row[source])
+            for name, source, converter in fields
+        }
+
+    return convert
+
+
+def list_values(queryset, serializer, extra_fields=()):
+    """``values()`` queryset with the columns ``serializer`` reads, plus ``extra_fields``."""
+    columns = [field.source for field in serializer._readable_fields]
+    columns.extend(field for field in extra_fields if field not in columns)
+    return queryset.values(*columns)
+
+
+def validator_annotations(queryset):
+    """
+    ``max(updated_on)`` and row count of ``queryset`` as scalar subqueries, so they
+    ride along on the page query instead of costing a separate aggregate. They are
+    computed before any pagination filter is applied to the outer query.
+    """
+    base = queryset.order_by()
+    return {
+        "validator_last_modified": Subquery(
+            base.annotate(
+                value=Func(F("updated_on"), function="MAX", output_field=DateTimeField())
+            ).values("value")
+        ),
+        "validator_count": Subquery(
+            base.annotate(
+                value=Func(F("pk"), function="COUNT", output_field=IntegerField())
+            ).values("value")
+        ),
+    }
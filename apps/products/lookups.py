@@ -0,0 +1,62 @@
+from django.db import models
+from django.db.models import Lookup
+
+
+class FullTextDocumentField(models.TextField):
+    """
+    Maps to the hidden column an SQLite FTS5 table exposes under its own name.
+
+    Filtering on it with ``__match`` renders ``<table>.<table> MATCH <query>``, which
+    searches every indexed column and makes the ``rank`` column available.
+    """
+
+
+@FullTextDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+class EpochSeconds(models.Func):
+    """Seconds since the Unix epoch of a datetime expression, as a float."""
+
+    template = "EXTRACT(EPOCH FROM %(expressions)s)"
+    output_field = models.FloatField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        template = "((julianday(%(expressions)s) - 2440587.5) * 86400.0)"
+        return self.as_sql(compiler, connection, template=template, **extra_context)
+
+
+class TableColumn(models.Expression):
+    """
+    A column of the query's base table that has no model field.
+
+    Bound to the base table's alias when resolved and relabeled with it, so the
+    column still refers to the right table inside a ``Subquery``.
+    """
+
+    def __init__(self, column, output_field, alias=None):
+        super().__init__(output_field=output_field)
+        self.column = column
+        self.alias = alias
+
+    def resolve_expression(
+        self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False
+    ):
+        resolved = self.copy()
+        resolved.alias = query.get_initial_alias()
+        return resolved
+
+    def relabeled_clone(self, relabels):
+        clone = self.copy()
+        clone.alias = relabels.get(self.alias, self.alias)
+        return clone
+
+    def as_sql(self, compiler, connection):
+        quote = compiler.quote_name_unless_alias
+        return f"{quote(self.alias)}.{quote(self.column)}", []
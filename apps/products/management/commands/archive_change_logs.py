@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.retention import archive_change_logs, compact_change_logs, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = "Archive old product change logs to gzip NDJSON files and compact recent history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.PRODUCT_CHANGE_LOG_RETENTION_DAYS,
+            help="Archive and delete change logs older than this many days.",
+        )
+        parser.add_argument(
+            "--compact-after",
+            type=int,
+            default=settings.PRODUCT_CHANGE_LOG_COMPACT_AFTER_DAYS,
+            help="Merge consecutive UPDATED entries older than this many days.",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=settings.PRODUCT_CHANGE_LOG_ARCHIVE_DIR,
+            help="Directory that receives the YYYY/MM/change_logs_YYYYMMDD_<id>.ndjson.gz files.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.PRODUCT_CHANGE_LOG_BATCH_SIZE,
+            help="Number of rows read, written and deleted per transaction.",
+        )
+        parser.add_argument(
+            "--skip-compact",
+            action="store_true",
+            help="Only archive; leave the remaining history untouched.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would change without writing archives or deleting rows.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1 or options["compact_after"] < 0 or options["batch_size"] < 1:
+            raise CommandError("--days and --batch-size must be positive, --compact-after >= 0.")
+
+        dry_run = options["dry_run"]
+        prefix = "Would archive" if dry_run else "Archived"
+        archived = archive_change_logs(
+            retention_cutoff(options["days"]),
+            archive_dir=options["archive_dir"],
+            batch_size=options["batch_size"],
+            dry_run=dry_run,
+        )
+        self.stdout.write(self.style.SUCCESS(f"{prefix} {archived} change log(s)"))
+
+        if options["skip_compact"]:
+            return
+
+        prefix = "Would remove" if dry_run else "Removed"
+        removed = compact_change_logs(
+            retention_cutoff(options["compact_after"]),
+            batch_size=options["batch_size"],
+            dry_run=dry_run,
+        )
+        self.stdout.write(self.style.SUCCESS(f"{prefix} {removed} change log(s) by compaction"))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.products.pricing import backfill_price_history
+
+
+class Command(BaseCommand):
+    help = "Build price history from change logs for products that have none."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.PRODUCT_BULK_BATCH_SIZE,
+            help="Number of products processed per chunk.",
+        )
+
+    def handle(self, *args, **options):
+        created = backfill_price_history(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} price point(s)"))
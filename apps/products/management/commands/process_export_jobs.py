@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.products.jobs import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Process pending product export jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new jobs instead of exiting once the queue is empty.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when running with --loop.",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Maximum number of jobs to process per poll.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_pending_jobs(limit=options["limit"])
+            if processed:
+                self.stdout.write(self.style.SUCCESS(f"Processed {processed} export job(s)"))
+
+            if not options["loop"]:
+                break
+            if not processed:
+                time.sleep(options["interval"])
@@ -0,0 +1,10 @@
+from .changelog import change_log_recorder
+
+
+class ChangeLogBufferMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with change_log_recorder.buffer():
+            return self.get_response(request)
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["created_on", "id"], name="products_created_7b0b9b_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["is_active", "created_on", "id"], name="products_is_acti_ab041b_idx"
+            ),
+        ),
+    ]
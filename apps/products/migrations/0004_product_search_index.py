@@ -0,0 +1,105 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:31
+
+import apps.products.lookups
+import django.db.models.deletion
+from django.db import migrations, models
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        product_id, title, description, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    "INSERT INTO products_fts(products_fts, rank) VALUES ('rank', 'bm25(0.0, 10.0, 1.0)')",
+    """
+    CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(product_id, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE products_fts MATCH 'product_id:"' || old.id || '"';
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_update AFTER UPDATE OF id, title, description ON products BEGIN
+        DELETE FROM products_fts WHERE products_fts MATCH 'product_id:"' || old.id || '"';
+        INSERT INTO products_fts(product_id, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    INSERT INTO products_fts(product_id, title, description)
+    SELECT id, title, description FROM products
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS products_fts_update",
+    "DROP TRIGGER IF EXISTS products_fts_delete",
+    "DROP TRIGGER IF EXISTS products_fts_insert",
+    "DROP TABLE IF EXISTS products_fts",
+]
+
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE products ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX products_search_vector_idx ON products USING GIN (search_vector)",
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS products_search_vector_idx",
+    "ALTER TABLE products DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_statements(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0003_product_export_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductSearchIndex",
+            fields=[
+                (
+                    "product",
+                    models.OneToOneField(
+                        db_column="product_id",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="products.product",
+                    ),
+                ),
+                ("title", models.TextField()),
+                ("description", models.TextField()),
+                ("document", apps.products.lookups.FullTextDocumentField(db_column="products_fts")),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "products_fts",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(
+            run_statements({"sqlite": SQLITE_FORWARD, "postgresql": POSTGRESQL_FORWARD}),
+            run_statements({"sqlite": SQLITE_BACKWARD, "postgresql": POSTGRESQL_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:38
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0004_product_search_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="productchangelog",
+            name="changed_at",
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
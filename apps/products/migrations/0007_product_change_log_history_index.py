@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0006_product_change_log_changed_at_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="productchangelog",
+            index=models.Index(
+                fields=["product", "changed_at", "id"], name="product_cha_product_6ddc73_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0007_product_change_log_history_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProductPricePoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("discount", models.DecimalField(decimal_places=2, max_digits=5)),
+                ("final_price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("recorded_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="price_history",
+                        to="products.product",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Product Price Point",
+                "verbose_name_plural": "Product Price History",
+                "db_table": "product_price_history",
+                "ordering": ["recorded_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["product", "recorded_at", "id"],
+                        name="product_pri_product_2b39c3_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:58
+
+import apps.products.models
+from django.conf import settings
+from django.db import migrations, models
+
+# SQLite can only add a stored generated column by rebuilding the table, which
+# drops the full-text triggers from 0004; put them back after every rebuild.
+SQLITE_FTS_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS products_fts_insert",
+    "DROP TRIGGER IF EXISTS products_fts_delete",
+    "DROP TRIGGER IF EXISTS products_fts_update",
+    """
+    CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(product_id, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE products_fts MATCH 'product_id:"' || old.id || '"';
+    END
+    """,
+    """
+    CREATE TRIGGER products_fts_update AFTER UPDATE OF id, title, description ON products BEGIN
+        DELETE FROM products_fts WHERE products_fts MATCH 'product_id:"' || old.id || '"';
+        INSERT INTO products_fts(product_id, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+
+def restore_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for statement in SQLITE_FTS_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0008_product_price_history"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts_triggers),
+        migrations.AddField(
+            model_name="product",
+            name="final_price",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=apps.products.models.final_price_expression(),
+                output_field=models.DecimalField(decimal_places=2, max_digits=10),
+            ),
+        ),
+        migrations.RunPython(restore_fts_triggers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["is_active", "final_price"], name="products_is_acti_1d1db4_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("products", "0009_product_final_price"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productexportjob",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="productexportjob",
+            name="heartbeat_on",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
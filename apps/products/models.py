@@ -1,8 +1,44 @@
+from decimal import Decimal
+
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, Value, When
+from django.db.models.functions import Cast, Round
+from django.db.models.lookups import Exact, GreaterThan
+from django.utils import timezone
+
+from apps.core.models import TimeStampedModel, UserTrackingModel
+
+from .lookups import FullTextDocumentField
+
 
-from apps.core.models import UserTrackingModel
+def _hundredths(field):
+    """``field`` (two decimal places) as an exact integer number of hundredths."""
+    return Cast(Round(F(field) * Value(100)), models.BigIntegerField())
+
+
+def final_price_expression():
+    """
+    ``price * (100 - discount) / 100`` to the cent, rounded half to even like
+    ``pricing.final_price``.
+
+    Everything is integer arithmetic on hundredths, so SQLite (which has no exact
+    decimal type) stores the same value as PostgreSQL: ``numerator / 10000`` is
+    the truncated result in cents and the remainder decides the rounding.
+    """
+    numerator = _hundredths("price") * (Value(10000) - _hundredths("discount"))
+    cents = numerator / Value(10000)
+    remainder = numerator - cents * Value(10000)
+    round_up = Case(
+        When(GreaterThan(remainder, 5000), then=Value(1)),
+        When(Exact(remainder, 5000), then=cents - cents / Value(2) * Value(2)),
+        default=Value(0),
+    )
+    return ExpressionWrapper(
+        (cents + round_up) * Value(Decimal("0.01")),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+    )
 
 
 class Product(UserTrackingModel):
@@ -22,6 +58,11 @@ class Product(UserTrackingModel):
     image = models.ImageField(upload_to="products/", null=True, blank=True)
     ssn = models.CharField(max_length=100, unique=True, db_index=True)
     is_active = models.BooleanField(default=True, db_index=True)
+    final_price = models.GeneratedField(
+        expression=final_price_expression(),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
 
     class Meta:
         db_table = "products"
@@ -31,17 +72,20 @@ class Product(UserTrackingModel):
         indexes = [
             models.Index(fields=["title", "is_active"]),
             models.Index(fields=["price", "is_active"]),
+            models.Index(fields=["created_on", "id"]),
+            models.Index(fields=["is_active", "created_on", "id"]),
+            models.Index(fields=["is_active", "final_price"]),
         ]
 
     def __str__(self):
         return self.title
 
-    @property
-    def final_price(self):
-        if self.discount > 0:
-            discount_amount = self.price * (self.discount / 100)
-            return self.price - discount_amount
-        return self.price
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # The database recomputes final_price; reload it on next access.
+            self.__dict__.pop("final_price", None)
 
     def soft_delete(self, user=None):
         self.is_active = False
@@ -50,6 +94,32 @@ class Product(UserTrackingModel):
         self.save(update_fields=["is_active", "updated_by", "updated_on"])
 
 
+class ProductSearchIndex(models.Model):
+    """
+    Read-only view of the SQLite FTS5 index over product titles and descriptions.
+
+    The table and the triggers that keep it in sync with ``products`` are created
+    by migration; on PostgreSQL the index lives in ``products.search_vector``.
+    """
+
+    product = models.OneToOneField(
+        "Product",
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="product_id",
+        db_constraint=False,
+        related_name="search_index",
+    )
+    title = models.TextField()
+    description = models.TextField()
+    document = FullTextDocumentField(db_column="products_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "products_fts"
+
+
 class ProductChangeLog(models.Model):
     ACTION_CREATED = "CREATED"
     ACTION_UPDATED = "UPDATED"
@@ -74,7 +144,7 @@ class ProductChangeLog(models.Model):
         on_delete=models.SET_NULL,
         null=True,
     )
-    changed_at = models.DateTimeField(auto_now_add=True)
+    changed_at = models.DateTimeField(default=timezone.now, editable=False)
     changes = models.JSONField(null=True, blank=True)
 
     class Meta:
@@ -82,6 +152,91 @@ class ProductChangeLog(models.Model):
         verbose_name = "Product Change Log"
         verbose_name_plural = "Product Change Logs"
         ordering = ["-changed_at"]
+        indexes = [
+            models.Index(fields=["changed_at", "id"]),
+            models.Index(fields=["product", "changed_at", "id"]),
+        ]
 
     def __str__(self):
         return f"{self.product.title} - {self.action} at {self.changed_at}"
+
+
+class ProductPricePoint(models.Model):
+    product = models.ForeignKey(
+        "Product",
+        on_delete=models.CASCADE,
+        related_name="price_history",
+    )
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    discount = models.DecimalField(max_digits=5, decimal_places=2)
+    final_price = models.DecimalField(max_digits=10, decimal_places=2)
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "product_price_history"
+        verbose_name = "Product Price Point"
+        verbose_name_plural = "Product Price History"
+        ordering = ["recorded_at"]
+        indexes = [
+            models.Index(fields=["product", "recorded_at", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.final_price} at {self.recorded_at}"
+
+
+class ProductExportJob(TimeStampedModel):
+    STATUS_PENDING = "PENDING"
+    STATUS_RUNNING = "RUNNING"
+    STATUS_COMPLETED = "COMPLETED"
+    STATUS_FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    FORMAT_CHOICES = [
+        ("xlsx", "Excel"),
+        ("csv", "CSV"),
+        ("ndjson", "NDJSON"),
+    ]
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="product_export_jobs",
+    )
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="xlsx")
+    params = models.JSONField(default=dict, blank=True)
+    fingerprint = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True
+    )
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    processed_rows = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to="exports/", null=True, blank=True)
+    error = models.TextField(blank=True)
+    started_on = models.DateTimeField(null=True, blank=True)
+    finished_on = models.DateTimeField(null=True, blank=True)
+    heartbeat_on = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "product_export_jobs"
+        verbose_name = "Product Export Job"
+        verbose_name_plural = "Product Export Jobs"
+        ordering = ["-created_on"]
+
+    def __str__(self):
+        return f"{self.format} export {self.id} ({self.status})"
+
+    @property
+    def progress(self):
+        if self.status == self.STATUS_COMPLETED:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(int(self.processed_rows * 100 / self.total_rows), 99)
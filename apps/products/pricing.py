@@ -0,0 +1,214 @@
+from datetime import timedelta
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+from itertools import chain
+
+from django.conf import settings
+from django.db.models import Count, Exists, F, IntegerField, Max, Min, OuterRef, Value, Window
+from django.db.models.functions import Cast, Floor, Greatest, Least, RowNumber
+from django.utils import timezone
+
+from .lookups import EpochSeconds
+from .models import Product, ProductChangeLog, ProductPricePoint
+
+CENT = Decimal("0.01")
+
+
+def final_price(price, discount):
+    price = Decimal(price)
+    discount = Decimal(discount)
+    if discount > 0:
+        price -= price * (discount / 100)
+    # Half to even, as the API has always serialized it; the generated
+    # ``Product.final_price`` column rounds the same way.
+    return price.quantize(CENT, rounding=ROUND_HALF_EVEN)
+
+
+def price_point(product_id, price, discount, recorded_at=None):
+    return ProductPricePoint(
+        product_id=product_id,
+        price=price,
+        discount=discount,
+        final_price=final_price(price, discount),
+        recorded_at=recorded_at or timezone.now(),
+    )
+
+
+def record_price_points(points):
+    if points:
+        ProductPricePoint.objects.bulk_create(points, batch_size=settings.PRODUCT_BULK_BATCH_SIZE)
+
+
+def _logged_value(change, key):
+    try:
+        return Decimal(change[key])
+    except (KeyError, TypeError, InvalidOperation):
+        return None
+
+
+def _rebuild_points(product, logs):
+    """
+    Replay the price/discount diffs in ``logs`` into one point per change.
+
+    The starting values are the ``old`` side of the first diff for each field, or the
+    current value when the field was never changed; they are recorded at creation.
+    """
+    initial = {"price": product["price"], "discount": product["discount"]}
+    for field in initial:
+        for _, changes in logs:
+            if field in changes:
+                value = _logged_value(changes[field], "old")
+                if value is not None:
+                    initial[field] = value
+                break
+
+    values = dict(initial)
+    points = [price_point(product["id"], recorded_at=product["created_on"], **values)]
+    for changed_at, changes in logs:
+        for field in values:
+            if field in changes:
+                value = _logged_value(changes[field], "new")
+                if value is not None:
+                    values[field] = value
+        points.append(price_point(product["id"], recorded_at=changed_at, **values))
+    return points
+
+
+def backfill_price_history(batch_size=None):
+    """
+    Create price history for products that have none, from their change logs.
+
+    Runs in primary-key chunks and skips products that already have points, so it is
+    safe to re-run. Returns the number of points created.
+    """
+    batch_size = batch_size or settings.PRODUCT_BULK_BATCH_SIZE
+    queryset = (
+        Product.objects.filter(~Exists(ProductPricePoint.objects.filter(product=OuterRef("pk"))))
+        .order_by("pk")
+        .values("id", "price", "discount", "created_on")
+    )
+
+    created = 0
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        products = list(chunk[:batch_size])
+        if not products:
+            return created
+        last_pk = products[-1]["id"]
+
+        logs = {product["id"]: [] for product in products}
+        rows = (
+            ProductChangeLog.objects.filter(
+                product_id__in=list(logs),
+                action__in=[ProductChangeLog.ACTION_UPDATED, ProductChangeLog.ACTION_DISABLED],
+                changes__has_any_keys=["price", "discount"],
+            )
+            .order_by("product_id", "changed_at", "id")
+            .values_list("product_id", "changed_at", "changes")
+        )
+        for product_id, changed_at, changes in rows:
+            logs[product_id].append((changed_at, changes))
+
+        points = []
+        for product in products:
+            points.extend(_rebuild_points(product, logs[product["id"]]))
+        record_price_points(points)
+        created += len(points)
+
+
+def _series_entry(recorded_at, point, low, high):
+    return {
+        "recorded_at": recorded_at,
+        "price": point.price,
+        "discount": point.discount,
+        "final_price": point.final_price,
+        "final_price_min": low,
+        "final_price_max": high,
+    }
+
+
+def _bucketed(history, first, width, buckets):
+    """
+    The last point of each non-empty time bucket, annotated with ``bucket``, ``low`` and ``high``.
+
+    Buckets are ``width`` wide from ``first``; the database assigns points to them and
+    picks each bucket's last point and final price range in a single query.
+    """
+    offset = EpochSeconds("recorded_at") - Value(first.timestamp())
+    # Clamped, as float rounding can put points on the range's ends just outside it.
+    bucket = Greatest(
+        Least(
+            Cast(Floor(offset / Value(width.total_seconds())), IntegerField()), Value(buckets - 1)
+        ),
+        Value(0),
+    )
+    return (
+        history.annotate(
+            bucket=bucket,
+            low=Window(Min("final_price"), partition_by=[bucket]),
+            high=Window(Max("final_price"), partition_by=[bucket]),
+            position=Window(
+                RowNumber(),
+                partition_by=[bucket],
+                order_by=[F("recorded_at").desc(), F("id").desc()],
+            ),
+        )
+        .filter(position=1)
+        .order_by("bucket")
+    )
+
+
+def price_series(product, buckets, start=None, end=None):
+    """
+    Price history of ``product`` between ``start`` and ``end``, in at most ``buckets`` entries.
+
+    The price in effect at ``start`` is carried in as the first point. When there are
+    more points than buckets, the range is split into equal time buckets and each
+    bucket reports its last price plus the lowest and highest final price seen in it.
+    """
+    history = product.price_history.order_by("recorded_at", "id").only(
+        "product", "price", "discount", "final_price", "recorded_at"
+    )
+
+    carried = None
+    if start is not None:
+        carried = history.filter(recorded_at__lt=start).last()
+        if carried is not None:
+            carried.recorded_at = start
+        history = history.filter(recorded_at__gte=start)
+    if end is not None:
+        history = history.filter(recorded_at__lte=end)
+
+    stats = history.aggregate(count=Count("id"), first=Min("recorded_at"), last=Max("recorded_at"))
+    if stats["count"] + (carried is not None) <= buckets:
+        points = chain([carried] if carried else [], history.iterator())
+        return [
+            _series_entry(point.recorded_at, point, point.final_price, point.final_price)
+            for point in points
+        ]
+
+    first = start if carried else stats["first"]
+    width = ((end or stats["last"]) - first) / buckets
+    if not width:
+        # Every point shares one timestamp, so they all fall in the first bucket.
+        width, buckets = timedelta(seconds=1), 1
+
+    series = [
+        _series_entry(
+            first + width * point.bucket,
+            point,
+            point.low.quantize(CENT),
+            point.high.quantize(CENT),
+        )
+        for point in _bucketed(history, first, width, buckets)
+    ]
+    if carried is not None:
+        # The carried point sits at ``start``, at the beginning of the first bucket.
+        if series and series[0]["recorded_at"] == first:
+            series[0]["final_price_min"] = min(series[0]["final_price_min"], carried.final_price)
+            series[0]["final_price_max"] = max(series[0]["final_price_max"], carried.final_price)
+        else:
+            series.insert(
+                0, _series_entry(first, carried, carried.final_price, carried.final_price)
+            )
+    return series
@@ -0,0 +1,56 @@
+from rest_framework.exceptions import NotAcceptable
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .exports import CSV_CONTENT_TYPE, NDJSON_CONTENT_TYPE, XLSX_CONTENT_TYPE
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Negotiates an export format for ``?format=`` or ``Accept``.
+
+    Export bodies are streamed by the view itself, so the only payloads that reach
+    ``render`` are error responses, which are sent back as JSON.
+    """
+
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        response = renderer_context.get("response")
+        if response is not None:
+            response["Content-Type"] = JSONRenderer.media_type
+        return JSONRenderer().render(data, renderer_context=renderer_context)
+
+
+class XLSXExportRenderer(ExportRenderer):
+    media_type = XLSX_CONTENT_TYPE
+    format = "xlsx"
+
+
+class CSVExportRenderer(ExportRenderer):
+    media_type = CSV_CONTENT_TYPE
+    format = "csv"
+
+
+class NDJSONExportRenderer(ExportRenderer):
+    media_type = NDJSON_CONTENT_TYPE
+    format = "ndjson"
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """
+    Content negotiation for export downloads.
+
+    Browsers and generic clients send ``Accept`` headers such as ``application/json``
+    that name no export format; they get the first renderer (XLSX) instead of a 406.
+    An unknown ``?format=`` is still a 404.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        try:
+            return super().select_renderer(request, renderers, format_suffix)
+        except NotAcceptable:
+            renderer = renderers[0]
+            return renderer, renderer.media_type
@@ -0,0 +1,194 @@
+import gzip
+import json
+import os
+from datetime import datetime, time, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ProductChangeLog
+
+ARCHIVE_FIELDS = ["id", "product_id", "action", "changed_by_id", "changed_at", "changes"]
+
+
+def retention_cutoff(days):
+    """Start of the UTC day ``days`` ago, so archive partitions always hold whole days."""
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    return datetime.combine(today - timedelta(days=days), time.min, tzinfo=dt_timezone.utc)
+
+
+def archive_path(archive_dir, day, first_id):
+    return os.path.join(
+        archive_dir, f"{day:%Y}", f"{day:%m}", f"change_logs_{day:%Y%m%d}_{first_id:012d}.ndjson.gz"
+    )
+
+
+def _read_archive(path):
+    if not os.path.exists(path):
+        return {}
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        return {json.loads(line)["id"]: line for line in archive}
+
+
+def _write_archive(archive_dir, rows):
+    """
+    Write ``rows`` to one file per UTC day, named after the first id it holds.
+
+    A batch that was written but whose delete never committed starts at the same id
+    on the next run, so its file is rewritten rather than appended to. Rows already
+    in that file are kept and their ids returned with the batch, so they are deleted
+    too and never end up in two archives. Returns the archived ids.
+    """
+    rows_by_day = {}
+    for row in rows:
+        day = row["changed_at"].astimezone(dt_timezone.utc).date()
+        rows_by_day.setdefault(day, []).append(row)
+
+    archived = set()
+    for day, day_rows in rows_by_day.items():
+        path = archive_path(archive_dir, day, day_rows[0]["id"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lines = _read_archive(path)
+        for row in day_rows:
+            lines[row["id"]] = json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+        partial_path = f"{path}.partial"
+        with gzip.open(partial_path, "wt", encoding="utf-8") as archive:
+            archive.writelines(lines[row_id] for row_id in sorted(lines))
+        os.replace(partial_path, path)
+        archived.update(lines)
+    return archived
+
+
+def archive_change_logs(cutoff, archive_dir=None, batch_size=None, dry_run=False):
+    """
+    Move change logs older than ``cutoff`` into gzip NDJSON files, one per day and batch.
+
+    Rows are read in primary-key chunks of ``batch_size``; each chunk's archive is
+    written and its rows deleted in one transaction, so a run that stops part way can
+    simply be repeated. Returns the number of rows archived.
+    """
+    archive_dir = archive_dir or settings.PRODUCT_CHANGE_LOG_ARCHIVE_DIR
+    batch_size = batch_size or settings.PRODUCT_CHANGE_LOG_BATCH_SIZE
+
+    queryset = (
+        ProductChangeLog.objects.filter(changed_at__lt=cutoff)
+        .order_by("id")
+        .values(*ARCHIVE_FIELDS)
+    )
+
+    archived = 0
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not rows:
+            return archived
+        last_id = rows[-1]["id"]
+        if dry_run:
+            archived += len(rows)
+            continue
+
+        with transaction.atomic():
+            ids = _write_archive(archive_dir, rows)
+            archived += ProductChangeLog.objects.filter(id__in=ids).delete()[0]
+
+
+def merge_changes(entries):
+    merged = {}
+    for changes in entries:
+        for field, change in (changes or {}).items():
+            if not isinstance(change, dict):
+                continue
+            if field in merged:
+                merged[field]["new"] = change.get("new")
+            else:
+                merged[field] = {"old": change.get("old"), "new": change.get("new")}
+
+    merged = {field: change for field, change in merged.items() if change["old"] != change["new"]}
+    return merged or {"message": f"Product updated {len(entries)} times"}
+
+
+def _iter_pages(queryset, batch_size):
+    rows = list(queryset[:batch_size])
+    while rows:
+        yield from rows
+        last = rows[-1]
+        rows = list(
+            queryset.filter(
+                Q(product_id__gt=last["product_id"])
+                | Q(product_id=last["product_id"], changed_at__gt=last["changed_at"])
+                | Q(product_id=last["product_id"], changed_at=last["changed_at"], id__gt=last["id"])
+            )[:batch_size]
+        )
+
+
+def compact_change_logs(cutoff, batch_size=None, dry_run=False):
+    """
+    Collapse runs of consecutive UPDATED entries for the same product and user.
+
+    Only entries older than ``cutoff`` are touched. The newest entry of each run is
+    kept with the merged diff (first ``old``, last ``new`` per field) and the rest
+    are deleted. Returns the number of rows removed.
+
+    Rows are read in keyset pages of ``batch_size`` rather than one open cursor,
+    because the merged and deleted rows live in the same table. Writes only touch
+    closed runs, which always sit before the current page.
+    """
+    batch_size = batch_size or settings.PRODUCT_CHANGE_LOG_BATCH_SIZE
+    queryset = (
+        ProductChangeLog.objects.filter(changed_at__lt=cutoff)
+        .order_by("product_id", "changed_at", "id")
+        .values("id", "product_id", "action", "changed_by_id", "changed_at", "changes")
+    )
+
+    removed = 0
+    to_update = []
+    to_delete = []
+
+    def flush():
+        if dry_run:
+            to_update.clear()
+            to_delete.clear()
+            return
+        with transaction.atomic():
+            if to_update:
+                ProductChangeLog.objects.bulk_update(to_update, ["changes"])
+            if to_delete:
+                ProductChangeLog.objects.filter(id__in=to_delete).delete()
+        to_update.clear()
+        to_delete.clear()
+
+    def close_run(run):
+        nonlocal removed
+        if len(run) < 2:
+            return
+        kept = ProductChangeLog(
+            id=run[-1]["id"], changes=merge_changes([r["changes"] for r in run])
+        )
+        to_update.append(kept)
+        to_delete.extend(r["id"] for r in run[:-1])
+        removed += len(run) - 1
+        if len(to_delete) >= batch_size:
+            flush()
+
+    run = []
+    for row in _iter_pages(queryset, batch_size):
+        if row["action"] != ProductChangeLog.ACTION_UPDATED:
+            close_run(run)
+            run = []
+            continue
+        if run and (
+            row["product_id"] != run[-1]["product_id"]
+            or row["changed_by_id"] != run[-1]["changed_by_id"]
+        ):
+            close_run(run)
+            run = []
+        run.append(row)
+    close_run(run)
+    flush()
+
+    return removed
@@ -0,0 +1,58 @@
+import re
+
+from django.db import connections
+from django.db.models import F, FloatField, Q, Value
+
+from .lookups import TableColumn
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def full_text_search_supported(queryset):
+    return connections[queryset.db].vendor in ("sqlite", "postgresql")
+
+
+def fts5_query(query):
+    tokens = TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    terms = " ".join(f'"{token}"*' for token in tokens)
+    return f"{{title description}} : ({terms})"
+
+
+def _sqlite_search(queryset, query):
+    match = fts5_query(query)
+    if match is None:
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+    return queryset.filter(search_index__document__match=match).annotate(
+        search_rank=-F("search_index__rank")
+    )
+
+
+def _postgresql_search(queryset, query):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+    vector = TableColumn("search_vector", output_field=SearchVectorField())
+    search_query = SearchQuery(query, config="english", search_type="websearch")
+    return (
+        queryset.alias(search_document=vector)
+        .filter(search_document=search_query)
+        .annotate(search_rank=SearchRank(vector, search_query))
+    )
+
+
+def search_products(queryset, query):
+    """
+    Filter ``queryset`` to products matching ``query`` and annotate ``search_rank``.
+
+    Higher ranks are better matches. Databases without a full-text index fall back
+    to ``icontains`` on title and description with a constant rank.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == "sqlite":
+        return _sqlite_search(queryset, query)
+    if vendor == "postgresql":
+        return _postgresql_search(queryset, query)
+    return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query)).annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
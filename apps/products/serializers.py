@@ -1,9 +1,35 @@
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+from .cache import catalog_version
+from .filters import ProductFilter
+from .models import Product, ProductChangeLog, ProductExportJob
+from .pricing import price_point, record_price_points
+from .suggest import title_index
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer that can be trimmed per request: ``fields`` keeps only the named
+    fields and ``omit`` drops the named ones.
+    """
 
-from .models import Product
+    def __init__(self, *args, fields=None, omit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in omit or ():
+            self.fields.pop(name, None)
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     final_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
@@ -19,7 +45,7 @@ class ProductListSerializer(serializers.ModelSerializer):
         ]
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     final_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     created_by = serializers.StringRelatedField(read_only=True)
     updated_by = serializers.StringRelatedField(read_only=True)
@@ -74,36 +100,480 @@ class ProductUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
+class ProductBulkItemSerializer(ProductCreateSerializer):
+    class Meta(ProductCreateSerializer.Meta):
+        extra_kwargs = {"ssn": {"validators": []}}
+
+    def validate_ssn(self, value):
+        # Uniqueness is checked for the whole batch in ProductBulkCreateSerializer.
+        return value
+
+
 class ProductBulkCreateSerializer(serializers.Serializer):
-    products = ProductCreateSerializer(many=True)
+    products = serializers.ListField(
+        allow_empty=False, error_messages={"empty": "Products list cannot be empty"}
+    )
+    partial = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        items = attrs["products"]
+        partial = attrs["partial"]
+
+        validated = {}
+        errors = {}
+        for index, item in enumerate(items):
+            serializer = ProductBulkItemSerializer(data=item, context=self.context)
+            if serializer.is_valid():
+                validated[index] = serializer.validated_data
+            else:
+                errors[index] = serializer.errors
+
+        indexes_by_ssn = defaultdict(list)
+        for index, product_data in validated.items():
+            indexes_by_ssn[product_data["ssn"]].append(index)
+
+        existing_ssns = Product.objects.filter(ssn__in=list(indexes_by_ssn)).values_list(
+            "ssn", flat=True
+        )
+        for ssn in existing_ssns:
+            for index in indexes_by_ssn.pop(ssn):
+                # Same message the per-item UniqueValidator used to produce.
+                errors[index] = {"ssn": ["Product with this ssn already exists."]}
+                del validated[index]
+
+        duplicates = [indexes for indexes in indexes_by_ssn.values() if len(indexes) > 1]
+
+        if not partial:
+            if errors:
+                raise serializers.ValidationError({"products": dict(sorted(errors.items()))})
+            if duplicates:
+                raise serializers.ValidationError(
+                    {"products": ["Duplicate SSNs found in the request"]}
+                )
+        else:
+            for indexes in duplicates:
+                for index in indexes[1:]:
+                    errors[index] = {"ssn": ["Duplicate SSN in the request"]}
+                    del validated[index]
+            if not validated:
+                raise serializers.ValidationError({"products": dict(sorted(errors.items()))})
+
+        attrs["products"] = [validated[index] for index in sorted(validated)]
+        attrs["rejected"] = {index: errors[index] for index in sorted(errors)}
+        return attrs
+
+    def create(self, validated_data):
+        products_data = validated_data.get("products", [])
+        user = self.context.get("request").user
+
+        batch_size = settings.PRODUCT_BULK_BATCH_SIZE
+
+        products = [
+            Product(**product_data, created_by=user, updated_by=user)
+            for product_data in products_data
+        ]
+        change_logs = [
+            ProductChangeLog(
+                product=product,
+                action=ProductChangeLog.ACTION_CREATED,
+                changed_by=user,
+                changes={"message": "Product created"},
+            )
+            for product in products
+        ]
+
+        with transaction.atomic():
+            Product.objects.bulk_create(products, batch_size=batch_size)
+            ProductChangeLog.objects.bulk_create(change_logs, batch_size=batch_size)
+            record_price_points(
+                [price_point(product.pk, product.price, product.discount) for product in products]
+            )
+            transaction.on_commit(partial(title_index.update_products, products))
+            transaction.on_commit(catalog_version.bump)
+
+        return products
+
+
+class ProductBulkUpsertSerializer(serializers.Serializer):
+    """
+    Creates or updates products keyed on ``ssn``, writing only rows that changed.
+
+    If a new SSN is inserted by someone else between a chunk's lookup and its
+    insert, the unique constraint rejects the insert (inside a savepoint) and the
+    chunk is retried, now finding the row and treating it as an update.
+    """
+
+    TRACKED_FIELDS = ["title", "description", "price", "discount"]
+    CONFLICT_RETRIES = 3
+
+    products = serializers.ListField(
+        allow_empty=False, error_messages={"empty": "Products list cannot be empty"}
+    )
 
     def validate_products(self, value):
-        if not value:
-            raise serializers.ValidationError("Products list cannot be empty")
+        validated = []
+        errors = []
+        for item in value:
+            serializer = ProductBulkItemSerializer(data=item, context=self.context)
+            if serializer.is_valid():
+                validated.append(serializer.validated_data)
+                errors.append({})
+            else:
+                errors.append(serializer.errors)
 
-        ssns = [product.get("ssn") for product in value if "ssn" in product]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        ssns = [product_data["ssn"] for product_data in validated]
         if len(ssns) != len(set(ssns)):
             raise serializers.ValidationError("Duplicate SSNs found in the request")
 
-        existing_ssns = Product.objects.filter(ssn__in=ssns).values_list("ssn", flat=True)
-        if existing_ssns:
-            raise serializers.ValidationError(
-                f"The following SSNs already exist: {', '.join(existing_ssns)}"
+        return validated
+
+    def create(self, validated_data):
+        products_data = validated_data["products"]
+        user = self.context.get("request").user
+        batch_size = settings.PRODUCT_BULK_BATCH_SIZE
+
+        result = {"created": 0, "updated": 0, "unchanged": 0}
+        touched = []
+        with transaction.atomic():
+            for start in range(0, len(products_data), batch_size):
+                chunk = products_data[start : start + batch_size]
+                touched.extend(self._upsert_chunk(chunk, user, result))
+            transaction.on_commit(partial(title_index.update_products, touched))
+            transaction.on_commit(catalog_version.bump)
+
+        return result
+
+    def _upsert_chunk(self, chunk, user, result):
+        for attempt in range(self.CONFLICT_RETRIES):
+            counts = {"created": 0, "updated": 0, "unchanged": 0}
+            try:
+                touched = self._write_chunk(chunk, user, counts)
+            except IntegrityError:
+                if attempt == self.CONFLICT_RETRIES - 1:
+                    raise
+                continue
+            for key, count in counts.items():
+                result[key] += count
+            return touched
+
+    def existing_products(self, ssns):
+        return {
+            product.ssn: product
+            for product in Product.objects.filter(ssn__in=ssns).only(
+                "id", "ssn", "is_active", *self.TRACKED_FIELDS
+            )
+        }
+
+    def _write_chunk(self, chunk, user, result):
+        existing = self.existing_products([product_data["ssn"] for product_data in chunk])
+
+        now = timezone.now()
+        created = []
+        updated = []
+        repriced = []
+        updated_fields = set()
+        change_logs = []
+
+        for product_data in chunk:
+            product = existing.get(product_data["ssn"])
+            if product is None:
+                product = Product(**product_data, created_by=user, updated_by=user)
+                created.append(product)
+                change_logs.append(
+                    ProductChangeLog(
+                        product=product,
+                        action=ProductChangeLog.ACTION_CREATED,
+                        changed_by=user,
+                        changes={"message": "Product created"},
+                    )
+                )
+                continue
+
+            changes = {}
+            for field in self.TRACKED_FIELDS:
+                if field not in product_data:
+                    continue
+                old_value = getattr(product, field)
+                new_value = product_data[field]
+                if old_value != new_value:
+                    changes[field] = {"old": str(old_value), "new": str(new_value)}
+                    setattr(product, field, new_value)
+
+            if not changes:
+                result["unchanged"] += 1
+                continue
+
+            product.updated_by = user
+            product.updated_on = now
+            updated.append(product)
+            if "price" in changes or "discount" in changes:
+                repriced.append(product)
+            updated_fields.update(changes)
+            change_logs.append(
+                ProductChangeLog(
+                    product=product,
+                    action=ProductChangeLog.ACTION_UPDATED,
+                    changed_by=user,
+                    changes=changes,
+                )
             )
 
+        if created:
+            # The insert is the chunk's first write, so rolling back just this
+            # savepoint on an SSN conflict leaves nothing half-applied.
+            with transaction.atomic():
+                Product.objects.bulk_create(created)
+        if updated:
+            Product.objects.bulk_update(
+                updated, [*sorted(updated_fields), "updated_by", "updated_on"]
+            )
+        if change_logs:
+            ProductChangeLog.objects.bulk_create(change_logs)
+        record_price_points(
+            [
+                price_point(product.pk, product.price, product.discount)
+                for product in created + repriced
+            ]
+        )
+
+        result["created"] += len(created)
+        result["updated"] += len(updated)
+        return created + updated
+
+
+class ProductBulkChangesSerializer(ProductUpdateSerializer):
+    class Meta(ProductUpdateSerializer.Meta):
+        fields = ["title", "description", "price", "discount"]
+        extra_kwargs = {field: {"required": False} for field in fields}
+
+
+class ProductBulkTargetSerializer(serializers.Serializer):
+    """Selects the products a bulk action applies to, by id list and/or ``ProductFilter``."""
+
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    filters = serializers.DictField(required=False, allow_empty=False)
+
+    def validate(self, attrs):
+        if not attrs.get("ids") and not attrs.get("filters"):
+            raise serializers.ValidationError("Either 'ids' or 'filters' is required")
+
+        queryset = Product.objects.all()
+        if attrs.get("ids"):
+            queryset = queryset.filter(pk__in=attrs["ids"])
+        if attrs.get("filters"):
+            filterset = ProductFilter(data=attrs["filters"], queryset=queryset)
+            if not filterset.is_valid():
+                raise serializers.ValidationError({"filters": filterset.errors})
+            queryset = filterset.qs
+
+        attrs["queryset"] = queryset
+        return attrs
+
+    def iter_chunks(self, queryset):
+        """Primary keys matching ``queryset``, in pk-ordered batches."""
+        batch_size = settings.PRODUCT_BULK_BATCH_SIZE
+        queryset = queryset.order_by("pk").values_list("id", flat=True)
+        last_pk = None
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            ids = list(chunk[:batch_size])
+            if not ids:
+                return
+            yield ids
+            last_pk = ids[-1]
+
+    def locked_rows(self, queryset, ids, fields):
+        """Current values of the rows in ``ids`` still matching ``queryset``, locked."""
+        return list(
+            queryset.select_for_update().filter(pk__in=ids).order_by("pk").values("id", *fields)
+        )
+
+
+class ProductBulkUpdateSerializer(ProductBulkTargetSerializer):
+    changes = ProductBulkChangesSerializer()
+
+    def validate_changes(self, value):
+        if not value:
+            raise serializers.ValidationError("At least one field to change is required")
         return value
 
     def create(self, validated_data):
-        products_data = validated_data.get("products", [])
+        changes = validated_data["changes"]
         user = self.context.get("request").user
+        fields = ["title", "is_active", *[field for field in changes if field != "title"]]
+        if "price" in changes or "discount" in changes:
+            fields = list(dict.fromkeys([*fields, "price", "discount"]))
 
-        products = []
-        for product_data in products_data:
-            product = Product.objects.create(
-                **product_data,
-                created_by=user,
-                updated_by=user,
-            )
-            products.append(product)
+        queryset = validated_data["queryset"]
+        result = {"matched": 0, "updated": 0}
+        for ids in self.iter_chunks(queryset):
+            result["matched"] += len(ids)
+            # Diffs are taken from rows locked in the same transaction as the update,
+            # so concurrent writes can't make the change logs disagree with the table.
+            with transaction.atomic():
+                changed_ids = []
+                change_logs = []
+                price_points = []
+                touched = []
+                for row in self.locked_rows(queryset, ids, fields):
+                    diff = {
+                        field: {"old": str(row[field]), "new": str(value)}
+                        for field, value in changes.items()
+                        if row[field] != value
+                    }
+                    if not diff:
+                        continue
+                    changed_ids.append(row["id"])
+                    touched.append(
+                        (row["id"], changes.get("title", row["title"]), row["is_active"])
+                    )
+                    if "price" in diff or "discount" in diff:
+                        price_points.append(
+                            price_point(
+                                row["id"],
+                                changes.get("price", row["price"]),
+                                changes.get("discount", row["discount"]),
+                            )
+                        )
+                    change_logs.append(
+                        ProductChangeLog(
+                            product_id=row["id"],
+                            action=(
+                                ProductChangeLog.ACTION_UPDATED
+                                if row["is_active"]
+                                else ProductChangeLog.ACTION_DISABLED
+                            ),
+                            changed_by=user,
+                            changes=diff,
+                        )
+                    )
 
-        return products
+                if not changed_ids:
+                    continue
+
+                Product.objects.filter(pk__in=changed_ids).update(
+                    **changes, updated_by=user, updated_on=timezone.now()
+                )
+                ProductChangeLog.objects.bulk_create(change_logs)
+                record_price_points(price_points)
+                transaction.on_commit(catalog_version.bump)
+                if "title" in changes:
+                    transaction.on_commit(partial(title_index.update_many, touched))
+            result["updated"] += len(changed_ids)
+
+        return result
+
+
+class ProductBulkDisableSerializer(ProductBulkTargetSerializer):
+    def create(self, validated_data):
+        user = self.context.get("request").user
+        queryset = validated_data["queryset"].filter(is_active=True)
+
+        result = {"matched": 0, "updated": 0}
+        for ids in self.iter_chunks(queryset):
+            result["matched"] += len(ids)
+            with transaction.atomic():
+                # Only rows still active once locked are disabled and logged.
+                ids = [row["id"] for row in self.locked_rows(queryset, ids, [])]
+                if not ids:
+                    continue
+                updated = Product.objects.filter(pk__in=ids).update(
+                    is_active=False, updated_by=user, updated_on=timezone.now()
+                )
+                ProductChangeLog.objects.bulk_create(
+                    ProductChangeLog(
+                        product_id=product_id,
+                        action=ProductChangeLog.ACTION_DISABLED,
+                        changed_by=user,
+                        changes={"is_active": {"old": "True", "new": "False"}},
+                    )
+                    for product_id in ids
+                )
+                transaction.on_commit(partial(title_index.remove_many, ids))
+                transaction.on_commit(catalog_version.bump)
+            result["updated"] += updated
+
+        return result
+
+
+class ProductChangeLogSerializer(serializers.ModelSerializer):
+    changed_by = serializers.SlugRelatedField(slug_field="username", read_only=True)
+    changes = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductChangeLog
+        fields = ["id", "action", "changed_by", "changed_at", "changes"]
+
+    def get_changes(self, obj):
+        """Field diffs as ``[old, new]`` pairs; message-only entries are passed through."""
+        return {
+            field: [change.get("old"), change.get("new")] if isinstance(change, dict) else change
+            for field, change in (obj.changes or {}).items()
+        }
+
+
+class ProductPriceHistoryQuerySerializer(serializers.Serializer):
+    buckets = serializers.IntegerField(min_value=1, max_value=1000, default=100)
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if attrs.get("start") and attrs.get("end") and attrs["start"] >= attrs["end"]:
+            raise serializers.ValidationError({"end": "Must be later than start"})
+        return attrs
+
+
+class ProductPricePointSerializer(serializers.Serializer):
+    recorded_at = serializers.DateTimeField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    discount = serializers.DecimalField(max_digits=5, decimal_places=2)
+    final_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    final_price_min = serializers.DecimalField(max_digits=10, decimal_places=2)
+    final_price_max = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class ProductExportJobCreateSerializer(serializers.Serializer):
+    format = serializers.ChoiceField(choices=ProductExportJob.FORMAT_CHOICES, default="xlsx")
+    filters = serializers.DictField(required=False, default=dict)
+
+    def validate_filters(self, value):
+        for key, item in value.items():
+            items = item if isinstance(item, list) else [item]
+            if any(isinstance(entry, (dict, list)) for entry in items):
+                raise serializers.ValidationError(f"Invalid value for filter '{key}'")
+        return value
+
+
+class ProductExportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.IntegerField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductExportJob
+        fields = [
+            "id",
+            "format",
+            "params",
+            "status",
+            "progress",
+            "total_rows",
+            "processed_rows",
+            "error",
+            "download_url",
+            "created_on",
+            "started_on",
+            "finished_on",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != ProductExportJob.STATUS_COMPLETED:
+            return None
+        return reverse(
+            "product-export-job-download",
+            kwargs={"pk": obj.pk},
+            request=self.context.get("request"),
+        )
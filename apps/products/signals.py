@@ -1,26 +1,38 @@
+from django.db import transaction
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 
+from .cache import catalog_version
+from .changelog import change_log_recorder
 from .models import Product, ProductChangeLog
+from .pricing import price_point
+from .suggest import title_index
 
 
 @receiver(post_save, sender=Product)
 def log_product_save(sender, instance, created, **kwargs):
+    product_id, title, is_active = instance.pk, instance.title, instance.is_active
+    transaction.on_commit(lambda: title_index.update(product_id, title, is_active))
+    transaction.on_commit(catalog_version.bump)
+
+    saved_changes = getattr(instance, "saved_changes", {})
+    if created or "price" in saved_changes or "discount" in saved_changes:
+        price_point(instance.pk, instance.price, instance.discount).save()
+
     if created:
-        ProductChangeLog.objects.create(
-            product=instance,
-            action=ProductChangeLog.ACTION_CREATED,
-            changed_by=instance.created_by,
-            changes={"message": "Product created"},
+        change_log_recorder.record(
+            ProductChangeLog(
+                product=instance,
+                action=ProductChangeLog.ACTION_CREATED,
+                changed_by=instance.created_by,
+                changes={"message": "Product created"},
+            )
         )
     else:
         changes = {}
-        if hasattr(instance, "_old_values"):
-            for field in ["title", "description", "price", "discount", "is_active"]:
-                old_value = getattr(instance._old_values, field, None)
-                new_value = getattr(instance, field)
-                if old_value != new_value:
-                    changes[field] = {"old": str(old_value), "new": str(new_value)}
+        for field, (old_value, new_value) in saved_changes.items():
+            if field in ["title", "description", "price", "discount", "is_active"]:
+                changes[field] = {"old": str(old_value), "new": str(new_value)}
 
         action = (
             ProductChangeLog.ACTION_DISABLED
@@ -28,16 +40,22 @@ def log_product_save(sender, instance, created, **kwargs):
             else ProductChangeLog.ACTION_UPDATED
         )
 
-        ProductChangeLog.objects.create(
-            product=instance,
-            action=action,
-            changed_by=instance.updated_by,
-            changes=changes if changes else {"message": "Product updated"},
+        change_log_recorder.record(
+            ProductChangeLog(
+                product=instance,
+                action=action,
+                changed_by=instance.updated_by,
+                changes=changes if changes else {"message": "Product updated"},
+            )
         )
 
 
 @receiver(pre_delete, sender=Product)
 def log_product_delete(sender, instance, **kwargs):
+    product_id = instance.pk
+    transaction.on_commit(lambda: title_index.remove(product_id))
+    transaction.on_commit(catalog_version.bump)
+
     ProductChangeLog.objects.create(
         product=instance,
         action=ProductChangeLog.ACTION_DELETED,
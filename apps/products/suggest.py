@@ -0,0 +1,192 @@
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models.functions import Lower
+
+from .models import Product
+
+
+def normalize_title(title):
+    return " ".join(title.casefold().split())
+
+
+class TitlePrefixIndex:
+    """
+    Per-process sorted-array index of active product titles for type-ahead lookups.
+
+    The index is built in the background on first use (lookups go to the database
+    until it is ready), kept current from the product signals, and rebuilt in the
+    background every ``PRODUCT_SUGGEST_REFRESH_SECONDS`` to pick up writes made by
+    other processes. Signal updates that arrive during a build are queued and
+    replayed onto the new index. Once ``PRODUCT_SUGGEST_MEMORY_BUDGET`` bytes are
+    used, the least recently updated entries are evicted first.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = []
+        self._titles = OrderedDict()
+        self._size = 0
+        self._built_at = None
+        self._pending = None
+        self.truncated = False
+
+    @property
+    def memory_budget(self):
+        return settings.PRODUCT_SUGGEST_MEMORY_BUDGET
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def _entry_size(self, key, product_id, title):
+        return sys.getsizeof(key) + sys.getsizeof(product_id) + sys.getsizeof(title) + 128
+
+    def build(self):
+        with self._lock:
+            if self._pending is None:
+                self._pending = []
+
+        try:
+            rows = []
+            size = 0
+            truncated = False
+            products = (
+                Product.objects.filter(is_active=True)
+                .order_by("-updated_on")
+                .values_list("id", "title")
+                .iterator(chunk_size=settings.PRODUCT_EXPORT_CHUNK_SIZE)
+            )
+            for product_id, title in products:
+                product_id = str(product_id)
+                key = normalize_title(title)
+                cost = self._entry_size(key, product_id, title)
+                if size + cost > self.memory_budget:
+                    truncated = True
+                    break
+                rows.append((product_id, key, title))
+                size += cost
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+
+        # Oldest first, so eviction order matches update order.
+        titles = OrderedDict(
+            (product_id, (key, title)) for product_id, key, title in reversed(rows)
+        )
+        entries = sorted((key, product_id) for product_id, key, _ in rows)
+        with self._lock:
+            self._entries = entries
+            self._titles = titles
+            self._size = size
+            self.truncated = truncated
+            pending, self._pending = self._pending, None
+            for product_id, title, is_active in pending:
+                self._apply(product_id, title, is_active)
+            self._built_at = time.monotonic()
+
+    def _build_in_background(self):
+        def refresh():
+            try:
+                self.build()
+            finally:
+                close_old_connections()
+
+        with self._lock:
+            if self._pending is not None:
+                return
+            self._pending = []
+        threading.Thread(target=refresh, name="product-suggest-refresh", daemon=True).start()
+
+    def ensure_built(self):
+        if not self.is_built or (
+            time.monotonic() - self._built_at > settings.PRODUCT_SUGGEST_REFRESH_SECONDS
+        ):
+            self._build_in_background()
+
+    def _remove(self, product_id):
+        existing = self._titles.pop(product_id, None)
+        if existing is None:
+            return
+        key, title = existing
+        index = bisect_left(self._entries, (key, product_id))
+        if index < len(self._entries) and self._entries[index] == (key, product_id):
+            del self._entries[index]
+        self._size -= self._entry_size(key, product_id, title)
+
+    def _apply(self, product_id, title, is_active):
+        self._remove(product_id)
+        if not is_active:
+            return
+
+        key = normalize_title(title)
+        cost = self._entry_size(key, product_id, title)
+        if cost > self.memory_budget:
+            self.truncated = True
+            return
+        insort(self._entries, (key, product_id))
+        self._titles[product_id] = (key, title)
+        self._size += cost
+        while self._size > self.memory_budget:
+            self._remove(next(iter(self._titles)))
+            self.truncated = True
+
+    def update(self, product_id, title, is_active):
+        product_id = str(product_id)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((product_id, title, is_active))
+            if self.is_built:
+                self._apply(product_id, title, is_active)
+
+    def update_many(self, rows):
+        for product_id, title, is_active in rows:
+            self.update(product_id, title, is_active)
+
+    def update_products(self, products):
+        self.update_many((product.pk, product.title, product.is_active) for product in products)
+
+    def remove(self, product_id):
+        self.remove_many([product_id])
+
+    def remove_many(self, product_ids):
+        for product_id in product_ids:
+            self.update(product_id, None, False)
+
+    def suggest(self, prefix, limit=10):
+        self.ensure_built()
+        prefix = normalize_title(prefix)
+        if not prefix:
+            return []
+        if not self.is_built:
+            return self._suggest_from_database(prefix, limit)
+
+        with self._lock:
+            entries = self._entries
+            titles = self._titles
+            index = bisect_left(entries, (prefix,))
+            results = []
+            while index < len(entries) and len(results) < limit:
+                key, product_id = entries[index]
+                if not key.startswith(prefix):
+                    break
+                results.append({"id": product_id, "title": titles[product_id][1]})
+                index += 1
+        return results
+
+    def _suggest_from_database(self, prefix, limit):
+        products = (
+            Product.objects.filter(is_active=True, title__istartswith=prefix)
+            .order_by(Lower("title"), "id")
+            .values_list("id", "title")[:limit]
+        )
+        return [{"id": str(product_id), "title": title} for product_id, title in products]
+
+
+title_index = TitlePrefixIndex()
@@ -1,3 +1,1181 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+import warnings
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import TextField
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from openpyxl import load_workbook
+from rest_framework import serializers
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.authentication.models import User
+
+from .admin import ProductAdmin
+from .cache import catalog_version, response_cache
+from .changelog import ChangeLogWriter, change_log_recorder
+from .checks import check_response_cache
+from .exports import EXPORT_HEADERS, XLSX_CONTENT_TYPE, xlsx_blocks
+from .jobs import claim_next_job, process_pending_jobs, recover_stale_jobs, run_export_job
+from .listing import validator_annotations
+from .lookups import TableColumn
+from .middleware import ChangeLogBufferMiddleware
+from .models import (
+    Product,
+    ProductChangeLog,
+    ProductExportJob,
+    ProductPricePoint,
+    ProductSearchIndex,
+)
+from .pricing import final_price, price_point, price_series, record_price_points
+from .retention import ARCHIVE_FIELDS, _write_archive, archive_change_logs, compact_change_logs
+from .search import search_products
+from .serializers import (
+    ProductBulkDisableSerializer,
+    ProductBulkUpsertSerializer,
+    ProductListSerializer,
+)
+from .suggest import TitlePrefixIndex, title_index
+
+
+def auth_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    return client
+
+
+@override_settings(PRODUCT_RESPONSE_CACHE_ENABLED=False)
+class ProductAPITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        response_cache.clear()
+        self.admin = User.objects.create_user(
+            "admin@example.com", "admin", "password123!", role="admin"
+        )
+        self.user = User.objects.create_user("user@example.com", "user", "password123!")
+        self.admin_client = auth_client(self.admin)
+        self.user_client = auth_client(self.user)
+
+    def create_product(self, index, **fields):
+        fields.setdefault("title", f"Product {index}")
+        fields.setdefault("description", f"Description {index}")
+        fields.setdefault("price", Decimal("10.00") + index)
+        fields.setdefault("ssn", f"SSN-{index:05d}")
+        return Product.objects.create(created_by=self.admin, updated_by=self.admin, **fields)
+
+    def walk(self, url, client=None):
+        """Follow ``next`` links from ``url`` and return every page's results."""
+        client = client or self.user_client
+        pages = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            data = response.json()
+            pages.append(data["results"])
+            url = data["next"]
+            self.assertLess(len(pages), 100, "cursor walk did not terminate")
+        return pages
+
+
+class KeysetCursorPaginationTests(ProductAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.products = [self.create_product(index) for index in range(45)]
+
+    def test_walks_every_row_once(self):
+        for ordering in ("-created_on", "price", "-price", "title"):
+            pages = self.walk(f"/api/products/?pagination=cursor&ordering={ordering}")
+            ids = [row["id"] for page in pages for row in page]
+            self.assertEqual(len(ids), 45)
+            self.assertEqual(len(set(ids)), 45)
+
+    def test_previous_link_walks_back(self):
+        first = self.user_client.get("/api/products/?pagination=cursor&ordering=price").json()
+        second = self.user_client.get(first["next"]).json()
+        back = self.user_client.get(second["previous"]).json()
+        self.assertEqual(back["results"], first["results"])
+
+    def test_empty_page_after_deletes(self):
+        first = self.user_client.get("/api/products/?pagination=cursor&ordering=price").json()
+        Product.objects.exclude(pk__in=[row["id"] for row in first["results"]]).delete()
+
+        response = self.user_client.get(first["next"])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["results"], [])
+        self.assertIsNone(data["next"])
+        # The previous page holds everything before the position the cursor was at.
+        back = self.user_client.get(data["previous"]).json()
+        self.assertEqual(back["results"], first["results"][:-1])
+
+    def test_invalid_cursor(self):
+        response = self.user_client.get("/api/products/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_keeps_rank_order(self):
+        for index in range(30):
+            self.create_product(100 + index, title=f"Lamp {index}", description="Lamp lamp lamp")
+        desk = self.create_product(200, title="Desk", description="Lamp")
+
+        expected = self.user_client.get("/api/products/search/?q=lamp").json()
+        pages = self.walk("/api/products/search/?q=lamp&pagination=cursor")
+        ids = [row["id"] for page in pages for row in page]
+        self.assertEqual(len(ids), 31)
+        self.assertEqual(len(set(ids)), 31)
+        self.assertEqual(ids[:20], [row["id"] for row in expected["results"]])
+        self.assertEqual(ids[-1], str(desk.pk))
+
+
+class FinalPriceCursorTests(ProductAPITestCase):
+    def test_walks_tied_half_cent_prices(self):
+        # 10.10 at 15% off is 8.585 exactly; the seek must use the stored, rounded value.
+        ids = {
+            str(self.create_product(index, price=Decimal("10.10"), discount=Decimal("15")).pk)
+            for index in range(45)
+        }
+        for ordering in ("final_price", "-final_price"):
+            with self.subTest(ordering=ordering):
+                pages = self.walk(f"/api/products/?pagination=cursor&ordering={ordering}")
+                rows = [row for page in pages for row in page]
+                self.assertEqual(len(rows), 45)
+                self.assertEqual({row["id"] for row in rows}, ids)
+                self.assertEqual({row["final_price"] for row in rows}, {"8.58"})
+
+    def test_stored_final_price_matches_pricing_and_baseline(self):
+        # Half cents, values binary floats cannot hold, and the extremes of both columns.
+        cases = [
+            ("10.10", "15.00"),
+            ("1.66", "75.00"),
+            ("10.05", "50.00"),
+            ("0.03", "50.00"),
+            ("0.01", "50.00"),
+            ("0.15", "50.00"),
+            ("19.99", "33.33"),
+            ("1234.56", "12.50"),
+            ("99999999.99", "99.99"),
+            ("99999999.99", "0.01"),
+            ("7.00", "100.00"),
+            ("3.33", "0.00"),
+        ]
+        # What the API returned while final_price was a model property.
+        baseline = serializers.DecimalField(max_digits=10, decimal_places=2)
+        for index, (price, discount) in enumerate(cases):
+            self.create_product(index, price=Decimal(price), discount=Decimal(discount))
+
+        rows = self.user_client.get("/api/products/", {"page_size": 50}).json()["results"]
+        api = {(row["price"], row["discount"]): row["final_price"] for row in rows}
+        stored = {
+            (str(price), str(discount)): value
+            for price, discount, value in Product.objects.values_list(
+                "price", "discount", "final_price"
+            )
+        }
+        for price, discount in cases:
+            with self.subTest(price=price, discount=discount):
+                exact = Decimal(price) - Decimal(price) * (Decimal(discount) / 100)
+                expected = baseline.to_representation(exact)
+                self.assertEqual(api[(price, discount)], expected)
+                self.assertEqual(str(stored[(price, discount)]), expected)
+                self.assertEqual(str(final_price(price, discount)), expected)
+
+
+class ProductExportTests(ProductAPITestCase):
+    def load_xlsx(self, content):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            workbook = load_workbook(io.BytesIO(content))
+        self.assertEqual([str(warning.message) for warning in caught], [])
+        return workbook
+
+    def test_xlsx_export(self):
+        for index in range(3):
+            self.create_product(index, title=f"Item {index} \x07<&>", discount=Decimal("15"))
+
+        response = self.admin_client.get("/api/products/export/?format=xlsx")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+        workbook = self.load_xlsx(b"".join(response.streaming_content))
+        rows = list(workbook["Products"].iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), EXPORT_HEADERS)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row[1] for row in rows[1:]}, {f"Item {i} <&>" for i in range(3)})
+        self.assertEqual(sorted(row[5] for row in rows[1:]), [8.5, 9.35, 10.2])
+
+    def test_xlsx_streams_before_reading_every_row(self):
+        consumed = []
+
+        def rows():
+            for index in range(20000):
+                consumed.append(index)
+                yield [f"row {index}", "x" * 40, index * 1.5]
+
+        blocks = xlsx_blocks(rows(), headers=["Name", "Text", "Value"])
+        first = next(blocks)
+        self.assertTrue(first)
+        self.assertLess(len(consumed), 20000)
+
+        workbook = self.load_xlsx(first + b"".join(blocks))
+        self.assertEqual(workbook.active.max_row, 20001)
+
+    def test_csv_and_ndjson_exports(self):
+        self.create_product(1, discount=Decimal("50"))
+
+        response = self.admin_client.get("/api/products/export/?format=csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+
+        response = self.admin_client.get("/api/products/export/?format=ndjson")
+        record = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(record["final_price"], "5.50")
+
+    def test_accept_header_selects_the_format(self):
+        self.create_product(1)
+
+        response = self.admin_client.get("/api/products/export/", HTTP_ACCEPT="text/csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+
+    def test_unmatched_accept_header_falls_back_to_xlsx(self):
+        self.create_product(1)
+
+        for accept in ("application/json", "text/html,application/xhtml+xml"):
+            response = self.admin_client.get("/api/products/export/", HTTP_ACCEPT=accept)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], XLSX_CONTENT_TYPE)
+            self.assertTrue(response["Content-Disposition"].endswith('.xlsx"'))
+            workbook = self.load_xlsx(b"".join(response.streaming_content))
+            self.assertEqual(workbook["Products"].max_row, 2)
+
+    def test_unknown_format_is_not_found(self):
+        response = self.admin_client.get("/api/products/export/?format=json")
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductExportJobTests(ProductAPITestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        for index in range(25):
+            self.create_product(index)
+
+    def create_job(self, filters=None, export_format="csv"):
+        response = self.user_client.post(
+            "/api/products/export-jobs/",
+            {"format": export_format, "filters": filters or {}},
+            format="json",
+        )
+        self.assertIn(response.status_code, (200, 202), response.content)
+        return ProductExportJob.objects.get(pk=response.json()["id"])
+
+    def test_job_applies_filters_and_ordering(self):
+        job = self.create_job({"price_min": 20, "ordering": "-price"})
+        self.assertEqual(process_pending_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProductExportJob.STATUS_COMPLETED)
+        self.assertEqual(job.total_rows, 15)
+        with job.file.open("rb") as handle:
+            rows = list(csv.reader(io.StringIO(handle.read().decode())))
+        self.assertEqual(rows[1][1], "Product 24")
+        self.assertEqual(len(rows), 16)
+
+    def test_stale_running_job_is_requeued(self):
+        job = self.create_job()
+        self.assertEqual(claim_next_job().pk, job.pk)
+        stale = timezone.now() - timedelta(hours=1)
+        ProductExportJob.objects.filter(pk=job.pk).update(heartbeat_on=stale)
+
+        self.assertEqual(process_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProductExportJob.STATUS_COMPLETED)
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(PRODUCT_EXPORT_JOB_MAX_ATTEMPTS=1)
+    def test_stale_job_fails_after_max_attempts(self):
+        job = self.create_job()
+        claim_next_job()
+        stale = timezone.now() - timedelta(hours=1)
+        ProductExportJob.objects.filter(pk=job.pk).update(heartbeat_on=stale)
+
+        self.assertEqual(recover_stale_jobs(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProductExportJob.STATUS_FAILED)
+
+    def test_result_of_requeued_job_is_discarded(self):
+        job = self.create_job()
+        claimed = claim_next_job()
+        ProductExportJob.objects.filter(pk=job.pk).update(
+            heartbeat_on=timezone.now() - timedelta(hours=1)
+        )
+        recover_stale_jobs()
+
+        run_export_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ProductExportJob.STATUS_PENDING)
+        self.assertFalse(job.file)
+
+
+class ProductSearchIndexTests(ProductAPITestCase):
+    def search(self, query):
+        return list(search_products(Product.objects.all(), query).values_list("title", flat=True))
+
+    def test_index_follows_updates(self):
+        product = self.create_product(0, title="Brass lamp", description="Desk light")
+        self.assertEqual(self.search("brass"), ["Brass lamp"])
+
+        product.title = "Copper kettle"
+        product.save()
+        Product.objects.filter(pk=product.pk).update(description="Stovetop")
+
+        self.assertEqual(self.search("brass"), [])
+        self.assertEqual(self.search("desk"), [])
+        self.assertEqual(self.search("copper stove"), ["Copper kettle"])
+        self.assertEqual(ProductSearchIndex.objects.filter(product=product).count(), 1)
+
+    def test_index_drops_deleted_products(self):
+        product = self.create_product(0, title="Brass lamp")
+        self.create_product(1, title="Brass bell")
+
+        product.delete()
+
+        self.assertEqual(self.search("brass"), ["Brass bell"])
+        self.assertFalse(ProductSearchIndex.objects.filter(product_id=product.pk).exists())
+
+    def test_table_column_follows_the_query_into_subqueries(self):
+        for index in range(3):
+            self.create_product(index)
+        matching = Product.objects.alias(
+            column=TableColumn("title", output_field=TextField())
+        ).filter(column="Product 1")
+
+        products = Product.objects.annotate(**validator_annotations(matching))
+        self.assertEqual(list(products.values_list("validator_count", flat=True)), [1, 1, 1])
+
+
+@override_settings(PRODUCT_SUGGEST_REFRESH_SECONDS=3600)
+class TitlePrefixIndexTests(ProductAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.index = TitlePrefixIndex()
+
+    def titles(self, prefix, limit=10):
+        return [row["title"] for row in self.index.suggest(prefix, limit=limit)]
+
+    def test_falls_back_to_database_until_built(self):
+        self.create_product(1, title="Wireless Mouse")
+        self.create_product(2, title="wire cutter", is_active=False)
+
+        with mock.patch.object(self.index, "_build_in_background") as build:
+            self.assertEqual(self.titles("WIRE"), ["Wireless Mouse"])
+        build.assert_called_once()
+
+    def test_updates_and_removals(self):
+        product = self.create_product(1, title="Wireless Mouse")
+        self.index.build()
+
+        self.index.update(product.pk, "Wire Brush", True)
+        self.assertEqual(self.titles("wire"), ["Wire Brush"])
+        self.index.remove(product.pk)
+        self.assertEqual(self.titles("wire"), [])
+
+    def test_evicts_least_recently_updated(self):
+        products = [self.create_product(index, title=f"Lamp {index}") for index in range(3)]
+        self.index.build()
+        entry_cost = self.index._size // 3
+
+        with override_settings(PRODUCT_SUGGEST_MEMORY_BUDGET=entry_cost * 3 + entry_cost // 2):
+            self.index.update(products[0].pk, "Lamp 0", True)
+            self.index.update(uuid.uuid4(), "Lamp 9", True)
+
+        self.assertTrue(self.index.truncated)
+        self.assertEqual(self.titles("lamp"), ["Lamp 0", "Lamp 2", "Lamp 9"])
+
+    def test_replays_updates_made_during_a_build(self):
+        product = self.create_product(1, title="Old Title")
+        self.index._pending = []  # a build has started
+        self.index.update(product.pk, "New Title", True)
+
+        self.index.build()
+        self.assertEqual(self.titles("new"), ["New Title"])
+        self.assertEqual(self.titles("old"), [])
+
+    def test_suggest_endpoint(self):
+        self.create_product(1, title="Wireless Mouse")
+        title_index.build()
+
+        response = self.user_client.get("/api/products/suggest/?q=wire")
+        self.assertEqual([row["title"] for row in response.json()["results"]], ["Wireless Mouse"])
+        self.assertEqual(self.user_client.get("/api/products/suggest/").status_code, 400)
+
+    def test_admin_actions_update_the_index(self):
+        products = [self.create_product(index, title=f"Zephyr {index}") for index in range(2)]
+        title_index.build()
+        product_admin = ProductAdmin(Product, admin.site)
+        request = RequestFactory().post("/admin/products/product/")
+        queryset = Product.objects.filter(pk__in=[product.pk for product in products])
+
+        with (
+            mock.patch.object(product_admin, "message_user"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            product_admin.disable_products(request, queryset)
+        self.assertEqual(title_index.suggest("zephyr"), [])
+
+        with (
+            mock.patch.object(product_admin, "message_user"),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            product_admin.enable_products(request, queryset)
+        self.assertEqual(
+            sorted(row["title"] for row in title_index.suggest("zephyr")), ["Zephyr 0", "Zephyr 1"]
+        )
+
+
+class ProductBulkCreateTests(ProductAPITestCase):
+    url = "/api/products/bulk_create/"
+
+    def item(self, ssn, **fields):
+        return {"title": f"Item {ssn}", "description": "d", "price": "10.00", "ssn": ssn, **fields}
+
+    def post(self, products, **extra):
+        return self.admin_client.post(self.url, {"products": products, **extra}, format="json")
+
+    def test_creates_products(self):
+        response = self.post([self.item("A1"), self.item("A2", discount="25")])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["count"], 2)
+        self.assertEqual(response.json()["products"][1]["final_price"], "7.50")
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_error_shapes(self):
+        self.create_product(1, ssn="EXISTS")
+
+        response = self.post([self.item("EXISTS"), self.item("NEW")])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {"products": {"0": {"ssn": ["Product with this ssn already exists."]}}}
+        )
+
+        response = self.post([self.item("NEW"), {"title": ""}])
+        self.assertEqual(list(response.json()["products"]), ["1"])
+
+        response = self.post([self.item("DUP"), self.item("DUP")])
+        self.assertEqual(response.json(), {"products": ["Duplicate SSNs found in the request"]})
+
+        response = self.post([])
+        self.assertEqual(response.json(), {"products": ["Products list cannot be empty"]})
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_partial_mode(self):
+        self.create_product(1, ssn="EXISTS")
+
+        response = self.post(
+            [self.item("EXISTS"), self.item("OK"), self.item("OK"), {"title": ""}], partial=True
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        data = response.json()
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["rejected_count"], 3)
+        self.assertEqual([error["index"] for error in data["errors"]], [0, 2, 3])
+        self.assertTrue(Product.objects.filter(ssn="OK").exists())
+
+
+class ProductBulkUpdateTests(ProductAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.products = [self.create_product(index) for index in range(4)]
+        self.ids = [str(product.pk) for product in self.products]
+
+    def logs(self, action):
+        return set(
+            ProductChangeLog.objects.filter(action=action).values_list("product_id", flat=True)
+        )
+
+    def test_bulk_update_logs_only_changed_rows(self):
+        Product.objects.filter(pk=self.products[0].pk).update(price=Decimal("99.00"))
+
+        response = self.admin_client.post(
+            "/api/products/bulk_update/",
+            {"ids": self.ids, "changes": {"price": "99.00"}},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.json()["matched"], response.json()["updated"]), (4, 3))
+        self.assertEqual(
+            self.logs(ProductChangeLog.ACTION_UPDATED), {p.pk for p in self.products[1:]}
+        )
+        self.assertEqual(Product.objects.filter(final_price=Decimal("99.00")).count(), 4)
+
+    def test_bulk_disable_logs_only_disabled_rows(self):
+        inactive = self.products[0]
+        inactive.is_active = False
+        inactive.save()
+        ProductChangeLog.objects.all().delete()
+
+        response = self.admin_client.post(
+            "/api/products/bulk_disable/", {"ids": self.ids}, format="json"
+        )
+        self.assertEqual(response.json()["updated"], 3)
+        self.assertEqual(
+            self.logs(ProductChangeLog.ACTION_DISABLED), {p.pk for p in self.products[1:]}
+        )
+
+    def test_bulk_disable_rechecks_rows_inside_the_transaction(self):
+        # The row is disabled after the batch of ids was read but before it is locked.
+        ids = [product.pk for product in self.products]
+        Product.objects.filter(pk=ids[0]).update(is_active=False)
+        ProductChangeLog.objects.all().delete()
+
+        with mock.patch.object(ProductBulkDisableSerializer, "iter_chunks", return_value=[ids]):
+            response = self.admin_client.post(
+                "/api/products/bulk_disable/", {"ids": self.ids}, format="json"
+            )
+        self.assertEqual(response.json()["updated"], 3)
+        self.assertNotIn(ids[0], self.logs(ProductChangeLog.ACTION_DISABLED))
+        self.assertEqual(len(self.logs(ProductChangeLog.ACTION_DISABLED)), 3)
+
+
+class ProductHistoryTests(ProductAPITestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = self.create_product(0)
+        self.url = f"/api/products/{self.product.pk}/history/"
+
+    def patch(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin_client.patch(
+                f"/api/products/{self.product.pk}/", data, format="json"
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def add_logs(self, count, start):
+        ProductChangeLog.objects.bulk_create(
+            ProductChangeLog(
+                product=self.product,
+                action=ProductChangeLog.ACTION_UPDATED,
+                changed_by=self.admin,
+                # Pairs of entries share a timestamp, so pages have to seek on the id too.
+                changed_at=start + timedelta(minutes=index // 2),
+                changes={"price": {"old": str(index), "new": str(index + 1)}},
+            )
+            for index in range(count)
+        )
+
+    def walk_next(self, url, pages):
+        for _ in range(pages):
+            url = self.admin_client.get(url).json()["next"]
+        return url
+
+    def test_api_changes_are_listed_newest_first(self):
+        self.patch(price="11.00")
+        self.patch(title="Renamed")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin_client.post(f"/api/products/{self.product.pk}/disable/")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.admin_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(
+            [row["action"] for row in results], ["DISABLED", "UPDATED", "UPDATED", "CREATED"]
+        )
+        self.assertEqual(results[0]["changes"], {"is_active": ["True", "False"]})
+        self.assertEqual(results[1]["changes"], {"title": ["Product 0", "Renamed"]})
+        self.assertEqual(results[2]["changes"], {"price": ["10.00", "11.00"]})
+        self.assertEqual({row["changed_by"] for row in results}, {"admin"})
+
+    def test_pages_walk_every_entry_once_in_order(self):
+        self.add_logs(45, timezone.now() - timedelta(days=1))
+        expected = list(
+            self.product.change_logs.order_by("-changed_at", "-id").values_list("id", flat=True)
+        )
+
+        pages = self.walk(self.url, client=self.admin_client)
+        self.assertEqual([len(page) for page in pages], [20, 20, 6])
+        self.assertEqual([row["id"] for page in pages for row in page], expected)
+
+        last = self.admin_client.get(self.walk_next(self.url, 2))
+        previous = self.admin_client.get(last.json()["previous"]).json()["results"]
+        self.assertEqual([row["id"] for row in previous], expected[20:40])
+
+    def test_action_filter(self):
+        self.add_logs(3, timezone.now() - timedelta(days=1))
+
+        response = self.admin_client.get(f"{self.url}?action=CREATED")
+        self.assertEqual([row["action"] for row in response.json()["results"]], ["CREATED"])
+
+        response = self.admin_client.get(f"{self.url}?action=CREATED&action=UPDATED")
+        self.assertEqual(len(response.json()["results"]), 4)
+
+        response = self.admin_client.get(f"{self.url}?action=DELETED")
+        self.assertEqual(response.json()["results"], [])
+
+    def test_changed_at_range_filter(self):
+        start = timezone.now() - timedelta(days=1)
+        self.add_logs(6, start)
+        after = (start + timedelta(minutes=1)).isoformat()
+        before = (start + timedelta(minutes=2)).isoformat()
+
+        response = self.admin_client.get(
+            self.url, {"changed_at_after": after, "changed_at_before": before}
+        )
+        # ``after`` is inclusive and ``before`` exclusive, so only minute 1 matches.
+        self.assertEqual(
+            [row["changes"] for row in response.json()["results"]],
+            [{"price": ["3", "4"]}, {"price": ["2", "3"]}],
+        )
+
+        response = self.admin_client.get(self.url, {"changed_at_after": before})
+        self.assertEqual(
+            [row["action"] for row in response.json()["results"]], ["CREATED", "UPDATED", "UPDATED"]
+        )
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.admin_client.get(f"{self.url}?action=RENAMED")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("action", response.json())
+
+        response = self.admin_client.get(f"{self.url}?changed_at_after=yesterday")
+        self.assertEqual(response.status_code, 400)
+
+    def test_history_is_admin_only(self):
+        self.assertEqual(self.user_client.get(self.url).status_code, 403)
+
+
+class ChangeLogBufferMiddlewareTests(ProductAPITestCase):
+    def test_flush_failure_after_commit_does_not_fail_the_request(self):
+        product = self.create_product(0)
+
+        def get_response(request):
+            with self.captureOnCommitCallbacks(execute=True):
+                product.title = "Renamed"
+                product.save()
+            return HttpResponse("ok")
+
+        middleware = ChangeLogBufferMiddleware(get_response)
+        with (
+            mock.patch(
+                "apps.products.changelog.write_entries", side_effect=RuntimeError("database gone")
+            ) as write_entries,
+            self.assertLogs("apps.products.changelog", "ERROR"),
+        ):
+            response = middleware(RequestFactory().patch("/api/products/"))
+
+        self.assertEqual(response.status_code, 200)
+        write_entries.assert_called_once()
+        self.assertEqual(Product.objects.get(pk=product.pk).title, "Renamed")
+
+    def test_bad_entry_is_dropped_without_losing_the_rest(self):
+        product = self.create_product(0)
+        entries = [
+            ProductChangeLog(
+                product=product,
+                action=ProductChangeLog.ACTION_UPDATED,
+                changes={"message": message},
+            )
+            for message in ("first", "broken", "last")
+        ]
+        entries[1].changed_at = None
+
+        with self.assertLogs("apps.products.changelog", "WARNING") as logs:
+            change_log_recorder.flush(entries)
+
+        self.assertEqual(
+            sorted(ProductChangeLog.objects.values_list("changes__message", flat=True)),
+            ["first", "last"],
+        )
+        self.assertEqual([record.levelname for record in logs.records], ["WARNING", "ERROR"])
+
+    def test_writer_thread_is_restarted_and_drains_the_queue(self):
+        with mock.patch("apps.products.changelog.write_entries") as write_entries:
+            writer = ChangeLogWriter()
+            writer.close()
+            self.assertFalse(writer._thread.is_alive())
+            writer._queue.put(["queued"])
+
+            writer.submit(["submitted"])
+            writer.close()
+
+        written = [entry for call in write_entries.call_args_list for entry in call.args[0]]
+        self.assertEqual(written, ["queued", "submitted"])
+
+
+class ChangeLogRetentionTests(ProductAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product(0)
+        self.old = timezone.now() - timedelta(days=30)
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+
+    def add_logs(self, count, action=ProductChangeLog.ACTION_UPDATED, start=0):
+        return ProductChangeLog.objects.bulk_create(
+            ProductChangeLog(
+                product=self.product,
+                action=action,
+                changed_by=self.admin,
+                changed_at=self.old + timedelta(minutes=start + index),
+                changes={"price": {"old": str(start + index), "new": str(start + index + 1)}},
+            )
+            for index in range(count)
+        )
+
+    def archived_ids(self):
+        ids = []
+        for root, _, files in os.walk(self.archive_dir):
+            for name in files:
+                with gzip.open(os.path.join(root, name), "rt", encoding="utf-8") as archive:
+                    ids.extend(json.loads(line)["id"] for line in archive)
+        return ids
+
+    def test_compaction_merges_runs_across_pages(self):
+        self.add_logs(5)
+        self.add_logs(1, action=ProductChangeLog.ACTION_DISABLED, start=5)
+        self.add_logs(3, start=6)
+
+        removed = compact_change_logs(timezone.now(), batch_size=2)
+
+        self.assertEqual(removed, 6)
+        updates = ProductChangeLog.objects.filter(action=ProductChangeLog.ACTION_UPDATED)
+        self.assertEqual(
+            [log.changes for log in updates.order_by("changed_at")],
+            [{"price": {"old": "0", "new": "5"}}, {"price": {"old": "6", "new": "9"}}],
+        )
+        self.assertEqual(ProductChangeLog.objects.count(), 3)
+
+    def test_archive_rerun_after_failed_delete_does_not_duplicate_rows(self):
+        self.add_logs(7)
+        rows = list(ProductChangeLog.objects.order_by("id").values(*ARCHIVE_FIELDS)[:4])
+        _write_archive(self.archive_dir, rows)  # archive written, delete never committed
+
+        archived = archive_change_logs(timezone.now(), archive_dir=self.archive_dir, batch_size=3)
+
+        self.assertEqual(archived, 7)
+        self.assertFalse(ProductChangeLog.objects.exists())
+        self.assertEqual(sorted(self.archived_ids()), sorted(set(self.archived_ids())))
+        self.assertEqual(len(self.archived_ids()), 7)
+
+
+class ProductPriceHistoryTests(ProductAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product(0)
+        self.product.price_history.all().delete()
+        self.start = timezone.now().replace(microsecond=0) - timedelta(days=1)
+
+    def add_points(self, *points):
+        record_price_points(
+            [
+                price_point(self.product.pk, Decimal(price), 0, recorded_at=recorded_at)
+                for recorded_at, price in points
+            ]
+        )
+
+    def test_long_range_is_downsampled_into_buckets(self):
+        self.add_points((self.start - timedelta(hours=1), 50))
+        self.add_points(*[(self.start + timedelta(minutes=30 + 60 * i), i + 1) for i in range(12)])
+        end = self.start + timedelta(hours=12)
+
+        with self.assertNumQueries(3):
+            series = price_series(self.product, 3, start=self.start, end=end)
+
+        self.assertEqual(
+            [entry["recorded_at"] for entry in series],
+            [self.start + timedelta(hours=hours) for hours in (0, 4, 8)],
+        )
+        self.assertEqual(
+            [
+                [str(entry[key]) for key in ("final_price", "final_price_min", "final_price_max")]
+                for entry in series
+            ],
+            [["4.00", "1.00", "50.00"], ["8.00", "5.00", "8.00"], ["12.00", "9.00", "12.00"]],
+        )
+
+    def test_api_returns_short_ranges_point_by_point(self):
+        self.add_points((self.start - timedelta(hours=1), 50))
+        self.add_points(*[(self.start + timedelta(hours=i), i + 1) for i in range(3)])
+
+        response = self.user_client.get(
+            f"/api/products/{self.product.pk}/price_history/",
+            {"start": (self.start + timedelta(minutes=30)).isoformat(), "buckets": 10},
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([row["final_price"] for row in results], ["1.00", "2.00", "3.00"])
+
+        response = self.user_client.get(
+            f"/api/products/{self.product.pk}/price_history/", {"buckets": 2}
+        )
+        results = response.json()["results"]
+        self.assertEqual([row["final_price"] for row in results], ["1.00", "3.00"])
+        self.assertEqual(results[0]["final_price_max"], "50.00")
+
+    def test_backfill_replays_change_logs_once(self):
+        other = self.create_product(1)
+        ProductChangeLog.objects.bulk_create(
+            ProductChangeLog(
+                product=self.product,
+                action=ProductChangeLog.ACTION_UPDATED,
+                changed_at=self.product.created_on + timedelta(hours=hours),
+                changes=changes,
+            )
+            for hours, changes in [
+                (1, {"price": {"old": "10.00", "new": "12.00"}}),
+                (2, {"title": {"old": "Product 0", "new": "Renamed"}}),
+                (3, {"discount": {"old": "0.00", "new": "10.00"}}),
+            ]
+        )
+
+        output = io.StringIO()
+        call_command("backfill_price_history", batch_size=1, stdout=output)
+        self.assertIn("Created 3 price point(s)", output.getvalue())
+        self.assertEqual(
+            [
+                str(point.final_price)
+                for point in self.product.price_history.order_by("recorded_at")
+            ],
+            ["10.00", "12.00", "10.80"],
+        )
+        self.assertEqual(other.price_history.count(), 1)
+
+        output = io.StringIO()
+        call_command("backfill_price_history", stdout=output)
+        self.assertIn("Created 0 price point(s)", output.getvalue())
+        self.assertEqual(ProductPricePoint.objects.count(), 4)
+
+
+@override_settings(PRODUCT_RESPONSE_CACHE_ENABLED=True)
+class ProductResponseCacheTests(ProductAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product(0)
+
+    def test_repeated_list_is_served_from_the_cache(self):
+        first = self.user_client.get("/api/products/")
+        with self.assertNumQueries(0):
+            second = self.user_client.get("/api/products/")
+        self.assertEqual(second.content, first.content)
+
+    def test_write_invalidates_cached_responses(self):
+        self.user_client.get("/api/products/")
+        self.user_client.get(f"/api/products/{self.product.pk}/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin_client.patch(
+                f"/api/products/{self.product.pk}/", {"title": "Renamed"}, format="json"
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        listing = self.user_client.get("/api/products/").json()
+        self.assertEqual(listing["results"][0]["title"], "Renamed")
+        detail = self.user_client.get(f"/api/products/{self.product.pk}/").json()
+        self.assertEqual(detail["title"], "Renamed")
+
+    def test_version_bump_from_another_writer_invalidates(self):
+        self.user_client.get("/api/products/")
+        Product.objects.filter(pk=self.product.pk).update(title="Changed elsewhere")
+        catalog_version.bump()
+
+        listing = self.user_client.get("/api/products/").json()
+        self.assertEqual(listing["results"][0]["title"], "Changed elsewhere")
+
+    def test_roles_are_cached_separately(self):
+        self.user_client.get("/api/products/")
+        self.assertEqual(len(response_cache._entries), 1)
+        self.admin_client.get("/api/products/")
+        self.assertEqual(len(response_cache._entries), 2)
+
+    @override_settings(DEBUG=False)
+    def test_check_requires_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_response_cache(None)], ["products.E001"])
+        with override_settings(PRODUCT_RESPONSE_CACHE_ENABLED=False):
+            self.assertEqual(check_response_cache(None), [])
+
+
+class ConditionalGetTests(ProductAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product(0)
+        self.create_product(1)
+        self.detail_url = f"/api/products/{self.product.pk}/"
+
+    def test_list_answers_conditional_requests_with_304(self):
+        response = self.user_client.get("/api/products/")
+        etag = response["ETag"]
+
+        response = self.user_client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_detail_answers_if_modified_since(self):
+        last_modified = self.user_client.get(self.detail_url)["Last-Modified"]
+        response = self.user_client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_that_lost_rows_is_not_reported_unmodified(self):
+        response = self.user_client.get("/api/products/")
+        self.assertNotIn("Last-Modified", response)
+        since = http_date(timezone.now().timestamp() + 60)
+        etag = response["ETag"]
+
+        self.admin_client.post(f"{self.detail_url}disable/")
+
+        response = self.user_client.get(
+            "/api/products/", HTTP_IF_MODIFIED_SINCE=since, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 1)
+        response = self.user_client.get("/api/products/", HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+
+    def test_failed_precondition_returns_412(self):
+        response = self.user_client.get(self.detail_url, HTTP_IF_MATCH='"stale"')
+        self.assertEqual(response.status_code, 412)
+
+        etag = self.user_client.get(self.detail_url)["ETag"]
+        response = self.user_client.get(self.detail_url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PRODUCT_RESPONSE_CACHE_ENABLED=True)
+    def test_cached_response_returns_412(self):
+        self.user_client.get(self.detail_url)
+        response = self.user_client.get(self.detail_url, HTTP_IF_MATCH='"stale"')
+        self.assertEqual(response.status_code, 412)
+
+    def test_edit_changes_the_etag(self):
+        etag = self.user_client.get(self.detail_url)["ETag"]
+        list_etag = self.user_client.get("/api/products/")["ETag"]
+        Product.objects.filter(pk=self.product.pk).update(
+            title="Renamed", updated_on=timezone.now() + timedelta(seconds=1)
+        )
+
+        self.assertEqual(
+            self.user_client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+        response = self.user_client.get("/api/products/", HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_validators_come_from_the_page_query(self):
+        url = "/api/products/?pagination=cursor"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.user_client.get(url)
+        self.assertTrue(response["ETag"])
+        product_queries = [q["sql"] for q in queries.captured_queries if '"products"' in q["sql"]]
+        self.assertEqual(len(product_queries), 1, product_queries)
+
+        # A conditional request is answered from one indexed query, before the page query.
+        with CaptureQueriesContext(connection) as queries:
+            conditional = self.user_client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(conditional.status_code, 304)
+        product_queries = [q["sql"] for q in queries.captured_queries if '"products"' in q["sql"]]
+        self.assertEqual(len(product_queries), 1, product_queries)
+
+
+class ProductListFastPathTests(ProductAPITestCase):
+    prices = [
+        ("10.00", "15.00"),
+        ("10.10", "15.00"),
+        ("100.00", "33.33"),
+        ("19.99", "0.00"),
+        ("7.00", "100.00"),
+        ("1234.56", "12.50"),
+    ]
+
+    def setUp(self):
+        super().setUp()
+        for index, (price, discount) in enumerate(self.prices):
+            self.create_product(index, price=Decimal(price), discount=Decimal(discount))
+
+    def test_matches_serializer_output(self):
+        queryset = Product.objects.order_by("-created_on")
+        for fieldset in ({}, {"fields": ["id", "final_price"]}, {"omit": ["created_on", "title"]}):
+            with self.subTest(fieldset=fieldset):
+                params = {key: ",".join(names) for key, names in fieldset.items()}
+                results = self.user_client.get("/api/products/", params).json()["results"]
+                serializer = ProductListSerializer(queryset, many=True, **fieldset)
+                self.assertEqual(results, json.loads(json.dumps(serializer.data)))
+
+    def test_whole_number_prices_are_not_truncated(self):
+        results = self.user_client.get("/api/products/?ordering=price").json()["results"]
+        final_prices = {row["price"]: row["final_price"] for row in results}
+        self.assertEqual(final_prices["10.00"], "8.50")
+        self.assertEqual(final_prices["100.00"], "66.67")
+        self.assertEqual(final_prices["7.00"], "0.00")
+        self.assertEqual(final_prices["1234.56"], "1080.24")
+
+
+class ProductSparseFieldsetTests(ProductAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product(0)
+        self.detail_url = f"/api/products/{self.product.pk}/"
+
+    def product_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.user_client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        sql = [q["sql"] for q in queries.captured_queries if '"products"' in q["sql"]]
+        return response.json(), sql[-1]
+
+    def test_unknown_fields_are_rejected(self):
+        for url in (
+            "/api/products/?fields=id,nope",
+            "/api/products/?omit=nope",
+            f"{self.detail_url}?fields=nope",
+        ):
+            with self.subTest(url=url):
+                response = self.user_client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertTrue(set(response.json()) & {"fields", "omit"})
+
+        response = self.user_client.get("/api/products/?fields=id,nope")
+        self.assertEqual(response.json()["fields"], ["Unknown field: nope"])
+
+    def test_list_fetches_only_requested_columns(self):
+        data, sql = self.product_queries("/api/products/?pagination=cursor&fields=id,title")
+        self.assertEqual(set(data["results"][0]), {"id", "title"})
+        self.assertNotIn('"products"."price"', sql)
+        self.assertNotIn('"products"."description"', sql)
+
+        data, sql = self.product_queries("/api/products/?omit=price,discount")
+        self.assertNotIn("price", data["results"][0])
+        self.assertIn("final_price", data["results"][0])
+
+    def test_retrieve_joins_only_shown_users(self):
+        data, sql = self.product_queries(self.detail_url)
+        self.assertEqual(data["created_by"], str(self.admin))
+        self.assertIn("JOIN", sql)
+
+        data, sql = self.product_queries(f"{self.detail_url}?fields=id,title,final_price")
+        self.assertEqual(set(data), {"id", "title", "final_price"})
+        self.assertNotIn("JOIN", sql)
+        self.assertNotIn('"products"."description"', sql)
+
+
+class ProductBulkUpsertTests(ProductAPITestCase):
+    url = "/api/products/bulk_upsert/"
+
+    def setUp(self):
+        super().setUp()
+        self.unchanged = self.create_product(0)
+        self.changed = self.create_product(1)
+        ProductPricePoint.objects.all().delete()
+
+    def item(self, product=None, index=None, **fields):
+        item = {
+            "title": product.title if product else f"New {index}",
+            "description": product.description if product else "New",
+            "price": str(product.price) if product else "20.00",
+            "discount": str(product.discount) if product else "0.00",
+            "ssn": product.ssn if product else f"NEW-{index}",
+        }
+        item.update(fields)
+        return item
+
+    @override_settings(PRODUCT_BULK_BATCH_SIZE=2)
+    def test_creates_updates_and_skips_unchanged_across_batches(self):
+        products = [
+            self.item(self.unchanged),
+            self.item(self.changed, price="50.00", discount="10.00"),
+            self.item(index=1),
+            self.item(index=2, discount="25.00"),
+        ]
+        response = self.admin_client.post(self.url, {"products": products}, format="json")
+
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((body["created"], body["updated"], body["unchanged"]), (2, 1, 1))
+
+        self.changed.refresh_from_db()
+        self.assertEqual(self.changed.final_price, Decimal("45.00"))
+        self.assertEqual(Product.objects.get(ssn="NEW-2").final_price, Decimal("15.00"))
+
+        log = ProductChangeLog.objects.get(
+            product=self.changed, action=ProductChangeLog.ACTION_UPDATED
+        )
+        self.assertEqual(set(log.changes), {"price", "discount"})
+        self.assertFalse(ProductChangeLog.objects.filter(product=self.unchanged).exists())
+        self.assertEqual(
+            ProductChangeLog.objects.filter(action=ProductChangeLog.ACTION_CREATED).count(), 2
+        )
+        self.assertEqual(
+            set(ProductPricePoint.objects.values_list("product__ssn", flat=True)),
+            {self.changed.ssn, "NEW-1", "NEW-2"},
+        )
+
+    def test_rejects_duplicate_ssns(self):
+        products = [self.item(index=1), self.item(index=1)]
+        response = self.admin_client.post(self.url, {"products": products}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"products": ["Duplicate SSNs found in the request"]})
+
+    def test_rejects_invalid_items_without_writing(self):
+        products = [self.item(index=1), self.item(index=2, price="-1")]
+        response = self.admin_client.post(self.url, {"products": products}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("price", response.json()["products"][1])
+        self.assertFalse(Product.objects.filter(ssn__startswith="NEW-").exists())
+
+    def test_requires_admin(self):
+        response = self.user_client.post(
+            self.url, {"products": [self.item(index=1)]}, format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_retries_a_chunk_when_a_new_ssn_is_inserted_concurrently(self):
+        # The row appears after the chunk looked it up but before it is inserted.
+        racing = self.create_product(5, ssn="NEW-1", title="Inserted elsewhere")
+        lookup = ProductBulkUpsertSerializer.existing_products
+        calls = []
+
+        def existing_products(serializer, ssns):
+            calls.append(ssns)
+            return {} if len(calls) == 1 else lookup(serializer, ssns)
+
+        with mock.patch.object(ProductBulkUpsertSerializer, "existing_products", existing_products):
+            response = self.admin_client.post(
+                self.url, {"products": [self.item(index=1)]}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((body["created"], body["updated"], body["unchanged"]), (0, 1, 0))
+        self.assertEqual(len(calls), 2)
+        racing.refresh_from_db()
+        self.assertEqual(racing.title, "New 1")
+        self.assertEqual(Product.objects.filter(ssn="NEW-1").count(), 1)
+
+    def test_unchanged_resync_does_not_write(self):
+        products = [self.item(self.unchanged), self.item(self.changed)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.post(self.url, {"products": products}, format="json")
+
+        self.assertEqual(response.json()["unchanged"], 2)
+        writes = [
+            q["sql"] for q in queries.captured_queries if q["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+        self.assertEqual(writes, [])
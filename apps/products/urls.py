@@ -3,9 +3,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import ProductViewSet
+from .views import ProductExportJobViewSet, ProductViewSet
 
 router = DefaultRouter()
+router.register(r"export-jobs", ProductExportJobViewSet, basename="product-export-job")
 router.register(r"", ProductViewSet, basename="product")
 
 urlpatterns = [
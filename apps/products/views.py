@@ -1,32 +1,83 @@
+import os
 from datetime import datetime
 
-from django.db.models import Q
-from django.http import HttpResponse
-from openpyxl import Workbook
-from rest_framework import status, viewsets
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Max
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from apps.authentication.permissions import IsAdminOrReadOnly
+from apps.authentication.permissions import IsAdmin, IsAdminOrReadOnly
+from apps.core.pagination import KeysetCursorPagination
 
-from .filters import ProductFilter
-from .models import Product
+from .cache import catalog_version, request_digest, response_cache
+from .exports import stream_export
+from .filters import ProductChangeLogFilter, ProductQueryMixin
+from .jobs import create_export_job, filtered_export_queryset
+from .listing import VALIDATOR_FIELDS, compile_row_converter, list_values, validator_annotations
+from .models import Product, ProductExportJob
+from .pricing import price_series
+from .renderers import (
+    CSVExportRenderer,
+    ExportContentNegotiation,
+    NDJSONExportRenderer,
+    XLSXExportRenderer,
+)
+from .search import search_products
 from .serializers import (
     ProductBulkCreateSerializer,
+    ProductBulkDisableSerializer,
+    ProductBulkUpdateSerializer,
+    ProductBulkUpsertSerializer,
+    ProductChangeLogSerializer,
     ProductCreateSerializer,
     ProductDetailSerializer,
+    ProductExportJobCreateSerializer,
+    ProductExportJobSerializer,
     ProductListSerializer,
+    ProductPriceHistoryQuerySerializer,
+    ProductPricePointSerializer,
     ProductUpdateSerializer,
 )
+from .suggest import title_index
+
+CONDITIONAL_HEADERS = (
+    "HTTP_IF_MATCH",
+    "HTTP_IF_NONE_MATCH",
+    "HTTP_IF_MODIFIED_SINCE",
+    "HTTP_IF_UNMODIFIED_SINCE",
+)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductChangeLogPagination(KeysetCursorPagination):
+    ordering = ("-changed_at", "-id")
+    tiebreaker_fields = ("changed_at", "id")
+
+
+class ProductViewSet(ProductQueryMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
-    filterset_class = ProductFilter
-    search_fields = ["title", "description"]
-    ordering_fields = ["created_on", "updated_on", "price", "title"]
-    ordering = ["-created_on"]
+    cursor_pagination_class = KeysetCursorPagination
+    history_pagination_class = ProductChangeLogPagination
+    sparse_fieldset_actions = ("list", "retrieve", "search")
+    related_fields = ("created_by", "updated_by")
+    search_ordering = ("-search_rank", "-created_on")
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.cursor_pagination_class.is_requested(self.request):
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     def get_queryset(self):
         queryset = Product.objects.all()
@@ -34,7 +85,18 @@ class ProductViewSet(viewsets.ModelViewSet):
         if self.action == "list" and not self.request.user.is_admin():
             queryset = queryset.filter(is_active=True)
 
-        return queryset.select_related("created_by", "updated_by")
+        if self.action in ("list", "search"):
+            return queryset
+        if self.action == "retrieve":
+            return self.narrow_queryset(queryset, self.get_serializer())
+        return queryset.select_related(*self.related_fields)
+
+    def narrow_queryset(self, queryset, serializer):
+        """Load only the columns ``serializer`` reads, joining only the users it shows."""
+        sources = {field.source for field in serializer._readable_fields}
+        columns = [field.name for field in Product._meta.concrete_fields if field.name in sources]
+        relations = [name for name in self.related_fields if name in sources]
+        return queryset.only(*columns).select_related(*relations)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -45,6 +107,200 @@ class ProductViewSet(viewsets.ModelViewSet):
             return ProductUpdateSerializer
         return ProductDetailSerializer
 
+    def get_cursor_ordering(self):
+        """Ordering cursors seek on instead of ``?ordering=``; search keeps rank order."""
+        if self.action == "search":
+            return self.search_ordering
+        return None
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_sparse_fieldset(self.get_serializer_class()))
+        return super().get_serializer(*args, **kwargs)
+
+    def get_sparse_fieldset(self, serializer_class):
+        """
+        ``fields``/``omit`` serializer kwargs from the query string of a read action.
+
+        Both take comma-separated field names of ``serializer_class``; unknown names
+        are rejected rather than silently ignored.
+        """
+        if self.action not in self.sparse_fieldset_actions:
+            return {}
+
+        available = serializer_class().fields
+        selection = {}
+        for param in ("fields", "omit"):
+            value = self.request.query_params.get(param, "")
+            names = [name.strip() for name in value.split(",") if name.strip()]
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                raise ValidationError({param: [f"Unknown field: {name}" for name in unknown]})
+            if names:
+                selection[param] = names
+        return selection
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(self.fast_list, request, *args, **kwargs)
+
+    def fast_list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()), with_validators=True)
+
+    def list_response(self, queryset, with_validators=False):
+        """
+        Paginated ``ProductListSerializer`` output built from ``values()`` rows.
+
+        Only the listed columns (narrowed by ``?fields=``/``?omit=``, plus the ordering
+        columns a cursor is built from) are fetched, and rows go through a converter
+        compiled from the serializer's fields, so the output matches the serializer
+        exactly. ``with_validators`` adds the filtered set's ``max(updated_on)`` and
+        count to the same query and keeps them in ``validator_stats``.
+        """
+        serializer = ProductListSerializer(**self.get_sparse_fieldset(ProductListSerializer))
+        extra_fields = []
+        if isinstance(self.paginator, KeysetCursorPagination):
+            ordering = self.paginator.get_ordering(self.request, queryset, self)
+            extra_fields = [field.lstrip("-") for field in ordering]
+        if with_validators:
+            queryset = queryset.annotate(**validator_annotations(queryset))
+            extra_fields.extend(VALIDATOR_FIELDS)
+        rows = list_values(queryset, serializer, extra_fields)
+        convert = compile_row_converter(serializer)
+
+        page = self.paginate_queryset(rows)
+        results = page if page is not None else list(rows)
+        if with_validators and results:
+            self.validator_stats = tuple(results[0][field] for field in VALIDATOR_FIELDS)
+
+        data = [convert(row) for row in results]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(self.fast_retrieve, request, *args, **kwargs)
+
+    def fast_retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        self.validator_stats = (instance.updated_on, 1)
+        return Response(self.get_serializer(instance).data)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """
+        Serve ``handler`` through ``response_cache`` and conditional GET.
+
+        Cached entries (keyed on action, role, query params and URL kwargs, tagged
+        with the catalog version every committed product write bumps) are answered
+        with no database work, ``If-None-Match`` included. On a miss, a conditional
+        request is checked against validators from one indexed query and answered
+        with 304 or 412 before anything is serialized; other requests take their
+        validators from the rows ``handler`` already fetched.
+        """
+        role = self.get_cache_role(request)
+        use_cache = settings.PRODUCT_RESPONSE_CACHE_ENABLED
+        if use_cache:
+            key = response_cache.make_key(self.action, role, request.query_params, kwargs)
+            version = catalog_version.get()
+            entry = response_cache.get(key, version)
+            if entry is not None:
+                return self.build_response(
+                    request,
+                    entry["content"],
+                    entry["content_type"],
+                    entry["etag"],
+                    entry["last_modified"],
+                )
+
+        etag, last_modified = None, None
+        if any(header in request.META for header in CONDITIONAL_HEADERS):
+            etag, last_modified = self.get_validators(
+                request, role, kwargs, self.get_validator_stats(kwargs)
+            )
+            if etag is not None:
+                response = self.build_response(request, etag=etag, last_modified=last_modified)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+
+        self.validator_stats = None
+        response = handler(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        if etag is None:
+            stats = self.validator_stats or self.get_validator_stats(kwargs)
+            etag, last_modified = self.get_validators(request, role, kwargs, stats)
+
+        renderer = request.accepted_renderer
+        content = renderer.render(
+            response.data, request.accepted_media_type, self.get_renderer_context()
+        )
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        if use_cache:
+            response_cache.set(key, version, content, content_type, etag, last_modified)
+        return self.build_response(request, content, content_type, etag, last_modified)
+
+    def get_cache_role(self, request):
+        return "admin" if request.user.is_admin() else "user"
+
+    def get_validator_stats(self, kwargs):
+        """
+        ``(last_modified, count)`` for a list or detail request from one indexed query,
+        or ``None`` when the product does not exist.
+
+        Detail stats come from the product's ``updated_on``; list stats from
+        ``max(updated_on)`` and the row count of the filtered queryset, so edits,
+        additions and removals all change them.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        if self.action == "retrieve":
+            lookup = {self.lookup_field: kwargs[self.lookup_url_kwarg or self.lookup_field]}
+            try:
+                updated_on = queryset.filter(**lookup).values_list("updated_on", flat=True)
+                last_modified = updated_on.first()
+            except (TypeError, ValueError, DjangoValidationError):
+                return None
+            return None if last_modified is None else (last_modified, 1)
+
+        stats = queryset.aggregate(last_modified=Max("updated_on"), count=Count("pk"))
+        return stats["last_modified"], stats["count"]
+
+    def get_validators(self, request, role, kwargs, stats):
+        """
+        ``(etag, last_modified)`` built from ``get_validator_stats()``-style ``stats``.
+
+        Lists get no ``Last-Modified``: ``max(updated_on)`` does not move when a row
+        leaves the set, so ``If-Modified-Since`` would answer 304 for a list that
+        lost rows. Their ETag includes the count and catches that.
+        """
+        if stats is None:
+            return None, None
+        last_modified, count = stats
+        stamp = last_modified.isoformat() if last_modified else None
+        digest = request_digest(self.action, role, request.query_params, kwargs, stamp, count)
+        if self.action != "retrieve" or last_modified is None:
+            return f'"{digest}"', None
+        return f'"{digest}"', int(last_modified.timestamp())
+
+    def build_response(
+        self, request, content=b"", content_type=None, etag=None, last_modified=None
+    ):
+        """
+        The response for ``content``, or whatever ``get_conditional_response`` answers
+        instead: a 304 carrying the validators, or a 412 for a failed precondition.
+        """
+        response = HttpResponse(content, content_type=content_type)
+        if etag is not None:
+            response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization"])
+        if etag is None:
+            return response
+        return get_conditional_response(
+            request, etag=etag, last_modified=last_modified, response=response
+        )
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user, updated_by=self.request.user)
 
@@ -68,63 +324,53 @@ class ProductViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK,
         )
 
-    @action(detail=False, methods=["get"])
+    @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated, IsAdmin])
+    def history(self, request, pk=None):
+        product = self.get_object()
+        filterset = ProductChangeLogFilter(
+            request.query_params,
+            queryset=product.change_logs.select_related("changed_by"),
+            request=request,
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        # Seeks on (product, changed_at, id), so each page is an index range scan.
+        paginator = self.history_pagination_class()
+        page = paginator.paginate_queryset(filterset.qs, request)
+        serializer = ProductChangeLogSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=["get"])
+    def price_history(self, request, pk=None):
+        product = self.get_object()
+        query = ProductPriceHistoryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        series = price_series(product, **query.validated_data)
+        serializer = ProductPricePointSerializer(series, many=True)
+        return Response({"product": str(product.pk), "results": serializer.data})
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[XLSXExportRenderer, CSVExportRenderer, NDJSONExportRenderer],
+        content_negotiation_class=ExportContentNegotiation,
+    )
     def export(self, request):
         queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
 
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Products"
-
-        headers = [
-            "ID",
-            "Title",
-            "Description",
-            "Price",
-            "Discount (%)",
-            "Final Price",
-            "SSN",
-            "Is Active",
-            "Created On",
-            "Updated On",
-        ]
-        ws.append(headers)
-
-        for product in queryset:
-            ws.append(
-                [
-                    str(product.id),
-                    product.title,
-                    product.description,
-                    float(product.price),
-                    float(product.discount),
-                    float(product.final_price),
-                    product.ssn,
-                    "Yes" if product.is_active else "No",
-                    product.created_on.strftime("%Y-%m-%d %H:%M:%S"),
-                    product.updated_on.strftime("%Y-%m-%d %H:%M:%S"),
-                ]
-            )
+        content_type = renderer.media_type
+        if renderer.format != "xlsx":
+            content_type = f"{content_type}; charset=utf-8"
 
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        response = StreamingHttpResponse(
+            stream_export(renderer.format, queryset), content_type=content_type
         )
-        filename = f'products_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx'
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"products_{timestamp}.{renderer.format}"
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-        wb.save(response)
         return response
 
     @action(detail=False, methods=["get"])
@@ -137,17 +383,26 @@ class ProductViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        queryset = self.get_queryset().filter(
-            Q(title__icontains=query) | Q(description__icontains=query)
-        )
+        queryset = search_products(self.get_queryset(), query).order_by(*self.search_ordering)
 
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = ProductListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        return self.list_response(queryset)
+
+    @action(detail=False, methods=["get"])
+    def suggest(self, request):
+        query = request.query_params.get("q", "").strip()
+
+        if not query:
+            return Response(
+                {"error": "Suggestion query parameter 'q' is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 50)
+        except ValueError:
+            limit = 10
 
-        serializer = ProductListSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response({"results": title_index.suggest(query, limit=max(limit, 1))})
 
     @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsAdminOrReadOnly])
     def bulk_create(self, request):
@@ -155,11 +410,101 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         products = serializer.save()
 
+        data = {
+            "message": f"{len(products)} products created successfully",
+            "count": len(products),
+            "products": ProductDetailSerializer(products, many=True).data,
+        }
+        if serializer.validated_data["partial"]:
+            rejected = serializer.validated_data["rejected"]
+            data["rejected_count"] = len(rejected)
+            data["errors"] = [
+                {"index": index, "errors": errors} for index, errors in rejected.items()
+            ]
+
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsAdminOrReadOnly])
+    def bulk_update(self, request):
+        serializer = ProductBulkUpdateSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+
+        return Response(
+            {"message": f"{result['updated']} products updated successfully", **result},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsAdminOrReadOnly])
+    def bulk_disable(self, request):
+        serializer = ProductBulkDisableSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+
+        return Response(
+            {"message": f"{result['updated']} products disabled successfully", **result},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated, IsAdminOrReadOnly])
+    def bulk_upsert(self, request):
+        serializer = ProductBulkUpsertSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+
         return Response(
             {
-                "message": f"{len(products)} products created successfully",
-                "count": len(products),
-                "products": ProductDetailSerializer(products, many=True).data,
+                "message": (
+                    f"{result['created']} products created, {result['updated']} updated, "
+                    f"{result['unchanged']} unchanged"
+                ),
+                **result,
             },
-            status=status.HTTP_201_CREATED,
+            status=status.HTTP_200_OK,
+        )
+
+
+class ProductExportJobViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    permission_classes = [IsAuthenticated]
+    serializer_class = ProductExportJobSerializer
+    filter_backends = []
+
+    def get_queryset(self):
+        return ProductExportJob.objects.filter(requested_by=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = ProductExportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        filters = serializer.validated_data["filters"]
+        filtered_export_queryset(filters, user=request.user)
+        job = create_export_job(request.user, serializer.validated_data["format"], filters)
+
+        return Response(
+            self.get_serializer(job).data,
+            status=(
+                status.HTTP_200_OK
+                if job.status == ProductExportJob.STATUS_COMPLETED
+                else status.HTTP_202_ACCEPTED
+            ),
+        )
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != ProductExportJob.STATUS_COMPLETED:
+            return Response(
+                {"error": f"Export job is {job.get_status_display().lower()}"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=os.path.basename(job.file.name),
         )
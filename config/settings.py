@@ -44,6 +44,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "apps.core.middleware.RateLimitMiddleware",
+    "apps.products.middleware.ChangeLogBufferMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -76,8 +77,8 @@ AUTH_USER_MODEL = "authentication.User"
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "rate-limit-cache",
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="rate-limit-cache"),
     }
 }
 
@@ -109,7 +110,7 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.authentication.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -132,6 +133,91 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Counters must be shared between workers: the core.W001 check flags a LocMemCache
+# RATE_LIMIT_CACHE when DEBUG is off.
+RATE_LIMIT_BACKEND = config("RATE_LIMIT_BACKEND", default="apps.core.ratelimit.CacheBackend")
+RATE_LIMIT_CACHE = config("RATE_LIMIT_CACHE", default="default")
+RATE_LIMIT_WINDOW = 60
+RATE_LIMITS = {"admin": 1000, "user": 100, "anonymous": 10}
+# Weighted endpoints, matched by URL name or path regex. ``cost`` (+ ``cost_per_kb``
+# of request body) is charged against RATE_LIMITS; ``limits`` adds a separate bucket
+# of units per ``window`` seconds for each role listed.
+RATE_LIMIT_QUOTAS = {
+    "export": {
+        "views": ["product-export"],
+        "cost": 10,
+        "limits": {"admin": 120, "user": 30},
+        "window": 3600,
+    },
+    "export_jobs": {
+        "views": ["product-export-job-list"],
+        "methods": ["POST"],
+        "cost": 5,
+        "limits": {"admin": 120, "user": 30},
+        "window": 3600,
+    },
+    "bulk": {
+        "views": [
+            "product-bulk-create",
+            "product-bulk-upsert",
+            "product-bulk-update",
+            "product-bulk-disable",
+        ],
+        "methods": ["POST"],
+        "cost": 5,
+        "cost_per_kb": 0.5,
+        "limits": {"admin": 5000},
+        "window": 3600,
+    },
+    "search": {
+        "views": ["product-search"],
+        "cost": 2,
+    },
+}
+JWT_VERIFY_CACHE_SIZE = config("JWT_VERIFY_CACHE_SIZE", default=10000, cast=int)
+JWT_USER_CACHE_SIZE = config("JWT_USER_CACHE_SIZE", default=10000, cast=int)
+JWT_USER_CACHE_SECONDS = config("JWT_USER_CACHE_SECONDS", default=300, cast=int)
+JWT_USER_LOCAL_CACHE_SECONDS = config("JWT_USER_LOCAL_CACHE_SECONDS", default=30, cast=int)
+JWT_BLACKLIST_SYNC_SECONDS = config("JWT_BLACKLIST_SYNC_SECONDS", default=5, cast=float)
+JWT_TRUST_ROLE_CLAIMS = config("JWT_TRUST_ROLE_CLAIMS", default=False, cast=bool)
+
+PRODUCT_EXPORT_CHUNK_SIZE = config("PRODUCT_EXPORT_CHUNK_SIZE", default=2000, cast=int)
+# Running export jobs without a heartbeat for this long are requeued, or failed after
+# PRODUCT_EXPORT_JOB_MAX_ATTEMPTS claims.
+PRODUCT_EXPORT_JOB_STALE_SECONDS = config("PRODUCT_EXPORT_JOB_STALE_SECONDS", default=600, cast=int)
+PRODUCT_EXPORT_JOB_MAX_ATTEMPTS = config("PRODUCT_EXPORT_JOB_MAX_ATTEMPTS", default=3, cast=int)
+PRODUCT_BULK_BATCH_SIZE = config("PRODUCT_BULK_BATCH_SIZE", default=500, cast=int)
+PRODUCT_CHANGE_LOG_ASYNC = config("PRODUCT_CHANGE_LOG_ASYNC", default=False, cast=bool)
+PRODUCT_CHANGE_LOG_BATCH_SIZE = config("PRODUCT_CHANGE_LOG_BATCH_SIZE", default=500, cast=int)
+PRODUCT_CHANGE_LOG_QUEUE_SIZE = config("PRODUCT_CHANGE_LOG_QUEUE_SIZE", default=100, cast=int)
+PRODUCT_CHANGE_LOG_QUEUE_TIMEOUT = config(
+    "PRODUCT_CHANGE_LOG_QUEUE_TIMEOUT", default=1.0, cast=float
+)
+PRODUCT_CHANGE_LOG_RETENTION_DAYS = config(
+    "PRODUCT_CHANGE_LOG_RETENTION_DAYS", default=90, cast=int
+)
+PRODUCT_CHANGE_LOG_COMPACT_AFTER_DAYS = config(
+    "PRODUCT_CHANGE_LOG_COMPACT_AFTER_DAYS", default=7, cast=int
+)
+PRODUCT_CHANGE_LOG_ARCHIVE_DIR = config(
+    "PRODUCT_CHANGE_LOG_ARCHIVE_DIR", default=os.path.join(BASE_DIR, "archives", "change_logs")
+)
+# Cached responses are invalidated through a catalog version kept in the default
+# cache, which only works when every worker shares it (products.E001).
+PRODUCT_RESPONSE_CACHE_ENABLED = config(
+    "PRODUCT_RESPONSE_CACHE_ENABLED",
+    default=not CACHES["default"]["BACKEND"].endswith(".LocMemCache"),
+    cast=bool,
+)
+PRODUCT_RESPONSE_CACHE_MAX_BYTES = config(
+    "PRODUCT_RESPONSE_CACHE_MAX_BYTES", default=32 * 1024 * 1024, cast=int
+)
+PRODUCT_RESPONSE_CACHE_SECONDS = config("PRODUCT_RESPONSE_CACHE_SECONDS", default=300, cast=int)
+PRODUCT_SUGGEST_MEMORY_BUDGET = config(
+    "PRODUCT_SUGGEST_MEMORY_BUDGET", default=32 * 1024 * 1024, cast=int
+)
+PRODUCT_SUGGEST_REFRESH_SECONDS = config("PRODUCT_SUGGEST_REFRESH_SECONDS", default=300, cast=int)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -146,6 +232,7 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
+    "TOKEN_REFRESH_SERIALIZER": "apps.authentication.serializers.CachedTokenRefreshSerializer",
 }
 
 CORS_ALLOW_ALL_ORIGINS = DEBUG